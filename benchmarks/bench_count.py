@@ -0,0 +1,74 @@
+"""Compare full JSON decoding with the streaming counter used for mailbox/domain counts.
+
+Usage: python benchmarks/bench_count.py [sizes...]
+
+For each synthetic ``mailbox/all`` payload, prints the decode time and the
+peak Python heap allocation (tracemalloc) of ``len(json.loads(body))`` versus
+``JsonArrayCounter`` fed with 64 KiB chunks, as aiohttp would deliver them.
+"""
+import importlib.util
+import json
+import pathlib
+import sys
+import time
+import tracemalloc
+
+from fake_mailcow import make_mailbox
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+COMPONENT = ROOT / "custom_components" / "mailcow_ha_custom"
+CHUNK_SIZE = 64 * 1024
+
+
+def _load_jsonstream():
+    # Chargé directement pour ne pas importer Home Assistant via __init__.py
+    spec = importlib.util.spec_from_file_location("jsonstream", COMPONENT / "jsonstream.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_payload(count: int) -> bytes:
+    return json.dumps([make_mailbox(i) for i in range(count)]).encode()
+
+
+def _measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def full_decode(body: bytes) -> int:
+    return len(json.loads(body))
+
+
+def streaming_count(counter_cls, body: bytes) -> int:
+    counter = counter_cls()
+    for offset in range(0, len(body), CHUNK_SIZE):
+        counter.feed(body[offset:offset + CHUNK_SIZE])
+    return counter.close()
+
+
+def main(sizes: list[int]) -> None:
+    counter_cls = _load_jsonstream().JsonArrayCounter
+    print(f"{'mailboxes':>10} {'payload':>10} {'method':>10} {'time ms':>10} {'peak MiB':>10}")
+    for size in sizes:
+        body = make_payload(size)
+        for name, func, args in (
+            ("json.loads", full_decode, (body,)),
+            ("streaming", streaming_count, (counter_cls, body)),
+        ):
+            count, elapsed, peak = _measure(func, *args)
+            assert count == size, (name, count, size)
+            print(
+                f"{size:>10} {len(body) / 2**20:>9.1f}M {name:>10} "
+                f"{elapsed * 1000:>10.1f} {peak / 2**20:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,170 @@
+"""Measure what the containers sensor costs the recorder, raw payload vs summary attributes.
+
+Usage: python benchmarks/bench_recorder.py [--polls N] [--restart-every K] [--no-save]
+
+Needs Home Assistant installed (requirements.txt). A throwaway
+HomeAssistant instance runs the real recorder on a SQLite file and the
+containers sensor state is set once per poll, as the coordinator would:
+
+- raw: attributes are the status/containers payload, as before the
+  summary was introduced
+- summary: attributes come from the sensor description ({container: state})
+
+Containers come from fake_mailcow.py. Every K polls one container restarts:
+it is "restarting" for one poll and back to "running" with a new
+started_at the next. The state machine already drops writes whose state
+and attributes did not change, so unchanged polls cost nothing in both
+variants; the difference is in the attribute rows of the polls that change.
+Results are appended to benchmarks/results/bench_recorder.json.
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from fake_mailcow import make_container
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from homeassistant import loader  # noqa: E402
+from homeassistant.config_entries import ConfigEntries  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.recorder import async_initialize_recorder, get_instance  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from custom_components.mailcow_ha_custom.models import index_containers  # noqa: E402
+from custom_components.mailcow_ha_custom.sensor_descriptions import SENSOR_TYPES  # noqa: E402
+
+RESULTS_FILE = ROOT / "benchmarks" / "results" / "bench_recorder.json"
+
+ENTITY_ID = "sensor.mailcow_containers_status"
+CONTAINERS = 25
+
+CONTAINERS_DESCRIPTION = next(d for d in SENSOR_TYPES if d.key == "containers_status")
+
+
+def container_payloads(polls: int, restart_every: int):
+    """Yield the status/containers payload of each poll."""
+    containers = dict(make_container(i) for i in range(CONTAINERS))
+    names = list(containers)
+    restarting: str | None = None
+    for poll in range(polls):
+        if restarting is not None:
+            containers[restarting] = {
+                **containers[restarting],
+                "state": "running",
+                "started_at": f"2024-06-01T12:{poll // 60 % 60:02d}:{poll % 60:02d}.000000000Z",
+            }
+            restarting = None
+        elif poll and poll % restart_every == 0:
+            restarting = names[poll // restart_every % len(names)]
+            containers[restarting] = {**containers[restarting], "state": "restarting"}
+        yield dict(containers)
+
+
+def raw_attributes(payload: dict) -> tuple[str, dict]:
+    return ("All Running" if all(c["state"] == "running" for c in payload.values()) else "Issues Detected", payload)
+
+
+def summary_attributes(payload: dict) -> tuple[str, dict]:
+    data = {"containers_status": payload, "containers": index_containers(payload)}
+    attributes = {**CONTAINERS_DESCRIPTION.attributes_fn(data), "stale": False}
+    return CONTAINERS_DESCRIPTION.value_fn(data), attributes
+
+
+async def run_variant(build, polls: int, restart_every: int) -> dict:
+    config_dir = tempfile.mkdtemp()
+    db_path = pathlib.Path(config_dir) / "home-assistant_v2.db"
+    hass = HomeAssistant(config_dir)
+    try:
+        loader.async_setup(hass)
+        # Fait par bootstrap au démarrage de HA
+        async_initialize_recorder(hass)
+        hass.config_entries = ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        await async_setup_component(
+            hass,
+            "recorder",
+            {"recorder": {"db_url": f"sqlite:///{db_path}", "commit_interval": 0}},
+        )
+        await hass.async_start()
+        instance = get_instance(hass)
+        await instance.async_block_till_done()
+        for payload in container_payloads(polls, restart_every):
+            state, attributes = build(payload)
+            hass.states.async_set(ENTITY_ID, state, attributes)
+            await hass.async_block_till_done()
+        await instance.async_block_till_done()
+    finally:
+        await hass.async_stop(force=True)
+    # Après l'arrêt : le journal WAL a été reporté dans le fichier
+    db_size = db_path.stat().st_size
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as connection:
+        states = connection.execute(
+            text(
+                "SELECT COUNT(*) FROM states JOIN states_meta USING (metadata_id)"
+                " WHERE states_meta.entity_id = :entity_id"
+            ),
+            {"entity_id": ENTITY_ID},
+        ).scalar()
+        attribute_rows, attribute_bytes = connection.execute(
+            text(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(shared_attrs)), 0) FROM state_attributes"
+                " WHERE attributes_id IN (SELECT attributes_id FROM states JOIN states_meta"
+                " USING (metadata_id) WHERE states_meta.entity_id = :entity_id)"
+            ),
+            {"entity_id": ENTITY_ID},
+        ).one()
+    engine.dispose()
+    return {
+        "state_rows": states,
+        "attribute_rows": attribute_rows,
+        "attribute_kib": round(attribute_bytes / 1024, 1),
+        "db_kib": round(db_size / 1024, 1),
+    }
+
+
+def _load_history() -> list[dict]:
+    try:
+        return json.loads(RESULTS_FILE.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def main(args: argparse.Namespace) -> None:
+    results = {}
+    for name, build in (("raw", raw_attributes), ("summary", summary_attributes)):
+        results[name] = asyncio.run(run_variant(build, args.polls, args.restart_every))
+        line = "  ".join(f"{metric} {value:>8}" for metric, value in results[name].items())
+        print(f"{name:>8}: {line}")
+
+    if args.save:
+        history = _load_history()
+        history.append(
+            {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "polls": args.polls,
+                "restart_every": args.restart_every,
+                "results": results,
+            }
+        )
+        RESULTS_FILE.parent.mkdir(exist_ok=True)
+        RESULTS_FILE.write_text(json.dumps(history, indent=2))
+        print(f"Saved to {RESULTS_FILE.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=1440)
+    parser.add_argument("--restart-every", type=int, default=60)
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    main(parser.parse_args())
@@ -0,0 +1,203 @@
+"""Measure MailcowCoordinator refresh wall time, event-loop blocking and peak memory.
+
+Usage: python benchmarks/bench_refresh.py [--refreshes N] [--scenario NAME ...] [--no-save]
+
+Needs Home Assistant installed (requirements.txt). For each scenario, the
+stub from fake_mailcow.py is started in a child process with its own payload
+sizes, latency and failure rate, a throwaway HomeAssistant instance is created and the real
+coordinator runs N refreshes with every key forced due:
+
+- refresh: wall time of one async_refresh (p50 / max)
+- blocked: event-loop stalls seen by a 1 ms heartbeat, summed and max,
+  counting only lags above BLOCK_THRESHOLD as HA's slow callback check does
+- peak: tracemalloc peak of one extra refresh, measured apart because
+  tracing slows everything else down
+
+Results are appended to benchmarks/results/bench_refresh.json and compared
+with the previous run; slowdowns above REGRESSION_RATIO are flagged.
+"""
+import argparse
+import asyncio
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import aiohttp
+
+from fake_mailcow import API_KEY, GITHUB_TAGS_PATH, FakeMailcowConfig, start_server_process
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.components.network.network import async_get_network  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.mailcow_ha_custom import github  # noqa: E402
+from custom_components.mailcow_ha_custom.api import MailcowAPI  # noqa: E402
+from custom_components.mailcow_ha_custom.const import CONF_API_KEY, CONF_BASE_URL  # noqa: E402
+from custom_components.mailcow_ha_custom.coordinator import MailcowCoordinator  # noqa: E402
+
+RESULTS_FILE = ROOT / "benchmarks" / "results" / "bench_refresh.json"
+
+HEARTBEAT = 0.001
+BLOCK_THRESHOLD = 0.005
+REGRESSION_RATIO = 1.2
+# Écarts absolus sous lesquels une variation est du bruit de mesure
+NOISE_FLOOR = {"refresh_p50_ms": 1.0, "refresh_max_ms": 2.0, "blocked_ms": 5.0, "max_block_ms": 2.0, "peak_mib": 0.5}
+
+SCENARIOS: dict[str, tuple[FakeMailcowConfig, dict]] = {
+    "baseline": (FakeMailcowConfig(), {}),
+    "large": (
+        FakeMailcowConfig(mailboxes=20_000, domains=200, containers=40, queued=2_000),
+        {"mailbox_sensors": True},
+    ),
+    "logs": (FakeMailcowConfig(log_entries=500), {"log_sensors": True}),
+    "slow": (FakeMailcowConfig(latency=0.2), {}),
+    "flaky": (FakeMailcowConfig(failure_rate=0.3), {}),
+}
+
+
+class LoopMonitor:
+    """Heartbeat task measuring how late the event loop wakes it up."""
+
+    def __init__(self) -> None:
+        self.blocked = 0.0
+        self.max_block = 0.0
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + HEARTBEAT
+            await asyncio.sleep(HEARTBEAT)
+            lag = loop.time() - expected
+            if lag > BLOCK_THRESHOLD:
+                self.blocked += lag
+                self.max_block = max(self.max_block, lag)
+
+    def __enter__(self) -> "LoopMonitor":
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+
+async def _refresh(coordinator: MailcowCoordinator) -> None:
+    # Toutes les clés redeviennent dues, comme au premier rafraîchissement
+    coordinator._next_due.clear()
+    await coordinator.async_refresh()
+
+
+async def run_scenario(hass: HomeAssistant, name: str, refreshes: int) -> dict:
+    server_config, options = SCENARIOS[name]
+    server, base_url = start_server_process(config=server_config)
+    github.GITHUB_TAGS_URL = base_url + GITHUB_TAGS_PATH
+    session = aiohttp.ClientSession()
+    try:
+        api = MailcowAPI({CONF_BASE_URL: base_url, CONF_API_KEY: API_KEY}, session)
+        coordinator = MailcowCoordinator(
+            hass, api, 10, False, f"bench_{name}", base_url, **options
+        )
+        # Premier tour hors mesure : connexions et cache GitHub
+        await _refresh(coordinator)
+
+        timings = []
+        with LoopMonitor() as monitor:
+            for _ in range(refreshes):
+                start = time.perf_counter()
+                await _refresh(coordinator)
+                timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        await _refresh(coordinator)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "refresh_p50_ms": round(statistics.median(timings) * 1000, 2),
+            "refresh_max_ms": round(max(timings) * 1000, 2),
+            "blocked_ms": round(monitor.blocked * 1000, 2),
+            "max_block_ms": round(monitor.max_block * 1000, 2),
+            "peak_mib": round(peak / 2**20, 2),
+            "last_update_success": coordinator.last_update_success,
+            "api": dict(api.stats),
+        }
+    finally:
+        await session.close()
+        server.terminate()
+
+
+def _load_history() -> list[dict]:
+    try:
+        return json.loads(RESULTS_FILE.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _report(name: str, result: dict, previous: dict | None) -> None:
+    print(f"{name}: api {result['api']}")
+    for metric, floor in NOISE_FLOOR.items():
+        value = result[metric]
+        line = f"  {metric:>15} {value:>10.2f}"
+        if previous and metric in previous:
+            before = previous[metric]
+            line += f"  (previous {before:.2f})"
+            if value > before * REGRESSION_RATIO and value - before > floor:
+                line += "  REGRESSION"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> None:
+    history = _load_history()
+    last = history[-1]["scenarios"] if history else {}
+    results = {}
+    # Une seule instance : le cache GitHub, partagé, n'est interrogé qu'au premier scénario
+    hass = HomeAssistant(tempfile.mkdtemp())
+    # La session partagée de HA (cache GitHub) a besoin des interfaces réseau chargées
+    await async_get_network(hass)
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name] = await run_scenario(hass, name, args.refreshes)
+            _report(name, results[name], last.get(name))
+    finally:
+        await hass.async_stop(force=True)
+
+    if args.save:
+        history.append(
+            {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "refreshes": args.refreshes,
+                "scenarios": results,
+            }
+        )
+        RESULTS_FILE.parent.mkdir(exist_ok=True)
+        RESULTS_FILE.write_text(json.dumps(history, indent=2))
+        print(f"Saved to {RESULTS_FILE.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""Compare request latency with a shared session and a dedicated per-entry session.
+
+Usage: python benchmarks/bench_session.py [requests]
+
+Runs sequential GET status/version calls against the local stub from
+fake_mailcow.py (over TLS when the openssl CLI is available):
+
+- shared: one session, headers and ClientTimeout rebuilt per call (previous _get)
+- dedicated: tuned connector with preset headers/timeout (dedicated_session option)
+- no keep-alive: a new TLS handshake per request, for reference
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import aiohttp
+
+from fake_mailcow import API_KEY, start_server
+
+ENDPOINT = "/api/v1/get/status/version"
+
+
+async def _run(session: aiohttp.ClientSession, url: str, count: int, per_call_options: bool) -> list[float]:
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        if per_call_options:
+            headers = {"X-API-Key": API_KEY, "Accept": "application/json"}
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as resp:
+                await resp.json()
+        else:
+            async with session.get(url) as resp:
+                await resp.json()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{name:>14} mean {statistics.mean(timings) * 1000:7.2f} ms"
+        f"  p50 {statistics.median(timings) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms"
+    )
+
+
+async def main(count: int) -> None:
+    runner, base_url = await start_server()
+    url = base_url + ENDPOINT
+    print(f"{count} sequential requests to {base_url}")
+    try:
+        scenarios = (
+            ("shared", dict(connector=aiohttp.TCPConnector(ssl=False)), True),
+            (
+                "dedicated",
+                dict(
+                    connector=aiohttp.TCPConnector(
+                        ssl=False, limit=10, ttl_dns_cache=300, keepalive_timeout=75
+                    ),
+                    headers={"X-API-Key": API_KEY, "Accept": "application/json"},
+                    timeout=aiohttp.ClientTimeout(total=15),
+                ),
+                False,
+            ),
+            ("no keep-alive", dict(connector=aiohttp.TCPConnector(ssl=False, force_close=True)), True),
+        )
+        for name, kwargs, per_call in scenarios:
+            async with aiohttp.ClientSession(**kwargs) as session:
+                # Premier appel hors mesure : ouverture de la connexion
+                await _run(session, url, 1, per_call)
+                _report(name, await _run(session, url, count, per_call))
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
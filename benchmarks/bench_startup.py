@@ -0,0 +1,240 @@
+"""Measure how long the Mailcow integration takes to set up and to show data.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--scenario NAME ...] [--no-save]
+
+Needs Home Assistant installed (requirements.txt). Each run creates a
+throwaway HomeAssistant instance whose config directory links this
+repository's custom_components, adds a Mailcow config entry pointing at
+the stub from fake_mailcow.py (in a child process) and sets it up the way
+HA does at startup:
+
+- setup: adding the config entry until it is loaded
+- first_data: until the first refresh brought Mailcow data
+- latest_version: until the GitHub tags check answered (or gave up)
+
+Mailcow and GitHub are each reachable, slow (SLOW_LATENCY per response) or
+unreachable (a socket that accepts connections and never answers, like a
+firewall dropping outbound traffic). Results are appended to
+benchmarks/results/bench_startup.json.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+import platform
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+from fake_mailcow import API_KEY, GITHUB_TAGS_PATH, FakeMailcowConfig, start_server_process
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from homeassistant import loader  # noqa: E402
+from homeassistant.auth import auth_manager_from_config  # noqa: E402
+from homeassistant.components.network.network import async_get_network  # noqa: E402
+from homeassistant.config_entries import ConfigEntries, ConfigEntry, ConfigEntryState  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import (  # noqa: E402
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+    floor_registry as fr,
+    label_registry as lr,
+)
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+DOMAIN = "mailcow_ha_custom"
+
+RESULTS_FILE = ROOT / "benchmarks" / "results" / "bench_startup.json"
+
+SLOW_LATENCY = 2.0  # secondes
+# Au-delà, l'étape est comptée comme jamais atteinte
+DEADLINE = 30.0
+POLL = 0.005
+
+# (Mailcow, GitHub) : "ok", "slow" ou "down"
+SCENARIOS: dict[str, tuple[str, str]] = {
+    "reachable": ("ok", "ok"),
+    "github_slow": ("ok", "slow"),
+    "github_down": ("ok", "down"),
+    "mailcow_slow": ("slow", "ok"),
+    "mailcow_down": ("down", "ok"),
+    "all_down": ("down", "down"),
+}
+
+
+def start_blackhole() -> tuple[socket.socket, str]:
+    """Listen without ever accepting: connections open, requests hang until timeout."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for(milestones: dict, started: float) -> dict[str, float | None]:
+    """Time, from started, at which each predicate first held; None past DEADLINE."""
+    reached: dict[str, float | None] = dict.fromkeys(milestones)
+    while time.perf_counter() - started < DEADLINE:
+        for name, predicate in milestones.items():
+            if reached[name] is None and predicate():
+                reached[name] = round((time.perf_counter() - started) * 1000, 1)
+        if None not in reached.values():
+            break
+        await asyncio.sleep(POLL)
+    return reached
+
+
+async def run_once(mailcow: str, gh: str, urls: dict[str, str]) -> dict:
+    config_dir = tempfile.mkdtemp()
+    os.symlink(ROOT / "custom_components", pathlib.Path(config_dir) / "custom_components")
+    hass = HomeAssistant(config_dir)
+    try:
+        loader.async_setup(hass)
+        await async_get_network(hass)
+        for registry in (ar, dr, er, fr, lr):
+            await registry.async_load(hass)
+        # Comme au démarrage : http, requis par le webhook, a besoin de l'authentification
+        hass.auth = await auth_manager_from_config(hass, [], [])
+        hass.config_entries = ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        # Le webhook dépend de http : port libre pour ne pas gêner une instance locale
+        await async_setup_component(hass, "http", {"http": {"server_port": _free_port()}})
+
+        started = time.perf_counter()
+        # Importée ici pour que le coût d'import de l'intégration soit mesuré
+        from custom_components.mailcow_ha_custom import github
+
+        github.GITHUB_TAGS_URL = urls[f"github_{gh}"] + GITHUB_TAGS_PATH
+        base_url = urls[f"mailcow_{mailcow}"]
+        entry = ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title=base_url,
+            data={"base_url": base_url, "api_key": API_KEY},
+            options={},
+            source="user",
+            unique_id=None,
+            discovery_keys=MappingProxyType({}),
+            subentries_data=None,
+        )
+        # Ajout puis mise en place de l'entrée, comme au démarrage de HA
+        await hass.config_entries.async_add(entry)
+        setup = round((time.perf_counter() - started) * 1000, 1)
+        if entry.state is not ConfigEntryState.LOADED:
+            raise RuntimeError(f"Mailcow entry not loaded: {entry.state}")
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        reached = await _wait_for(
+            {
+                # Données fraîches, pas celles restaurées de l'instantané
+                "first_data_ms": lambda: (coordinator.data or {}).get("mailbox_count") is not None
+                and "mailbox_count" not in coordinator.stale_keys,
+                "latest_version_ms": lambda: "latest_version" in (coordinator.data or {}),
+            },
+            started,
+        )
+        await hass.config_entries.async_unload(entry.entry_id)
+        return {"setup_ms": setup, **reached}
+    finally:
+        await hass.async_stop(force=True)
+
+
+def _run_child(mailcow: str, gh: str, urls: dict[str, str], results) -> None:
+    # Avertissements et erreurs de connexion attendus dans les scénarios dégradés
+    logging.getLogger().setLevel(logging.CRITICAL)
+    results.put(asyncio.run(run_once(mailcow, gh, urls)))
+
+
+def run_isolated(mailcow: str, gh: str, urls: dict[str, str]) -> dict:
+    """Run one setup in a fresh interpreter: cold imports, and HA allows one instance per process."""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_child, args=(mailcow, gh, urls, results))
+    process.start()
+    try:
+        return results.get(timeout=4 * DEADLINE)
+    finally:
+        process.join()
+
+
+def run_scenario(name: str, runs: int, urls: dict[str, str]) -> dict:
+    mailcow, gh = SCENARIOS[name]
+    samples = [run_isolated(mailcow, gh, urls) for _ in range(runs)]
+    result = {}
+    for metric in ("setup_ms", "first_data_ms", "latest_version_ms"):
+        values = [sample[metric] for sample in samples]
+        # Une seule étape jamais atteinte rend la médiane non significative
+        result[metric] = None if None in values else statistics.median(values)
+    return result
+
+
+def _load_history() -> list[dict]:
+    try:
+        return json.loads(RESULTS_FILE.read_text())
+    except (OSError, ValueError):
+        return []
+
+
+def _format(value: float | None) -> str:
+    return f"{value:>10.1f}" if value is not None else f"{'> ' + str(int(DEADLINE)) + 's':>10}"
+
+
+def main(args: argparse.Namespace) -> None:
+    processes, sockets = [], []
+    urls: dict[str, str] = {}
+    for role in ("mailcow", "github"):
+        for state, latency in (("ok", 0.0), ("slow", SLOW_LATENCY)):
+            process, url = start_server_process(config=FakeMailcowConfig(latency=latency))
+            processes.append(process)
+            urls[f"{role}_{state}"] = url
+        sock, urls[f"{role}_down"] = start_blackhole()
+        sockets.append(sock)
+
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name] = run_scenario(name, args.runs, urls)
+            line = "  ".join(f"{metric} {_format(value)}" for metric, value in results[name].items())
+            print(f"{name:>13}: {line}")
+    finally:
+        for process in processes:
+            process.terminate()
+        for sock in sockets:
+            sock.close()
+
+    if args.save:
+        history = _load_history()
+        history.append(
+            {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "runs": args.runs,
+                "scenarios": results,
+            }
+        )
+        RESULTS_FILE.parent.mkdir(exist_ok=True)
+        RESULTS_FILE.write_text(json.dumps(history, indent=2))
+        print(f"Saved to {RESULTS_FILE.relative_to(ROOT)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS))
+    parser.add_argument("--no-save", dest="save", action="store_false")
+    main(parser.parse_args())
@@ -0,0 +1,316 @@
+"""Local aiohttp stub mimicking the Mailcow API endpoints used by the integration.
+
+Serves status/version, mailbox/all, domain/all, status/vmail,
+status/containers, mailq/all, quarantine/all, fail2ban, syncjobs/all,
+the rspamd/postfix logs and GitHub's mailcow-dockerized tags list. Payload sizes, per-request latency and
+failure injection are set with FakeMailcowConfig; bodies are encoded once
+at startup so the stub's own cost stays out of the measurements.
+"""
+import asyncio
+import json
+import multiprocessing
+import random
+import ssl
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiohttp import web
+
+API_KEY = "bench-api-key"
+GITHUB_TAGS_PATH = "/repos/mailcow/mailcow-dockerized/tags"
+VERSION = "2024-11b"
+STATS_KEY = web.AppKey("stats", dict)
+
+
+@dataclass
+class FakeMailcowConfig:
+    mailboxes: int = 100
+    domains: int = 10
+    containers: int = 25
+    queued: int = 20
+    log_entries: int = 500
+    quarantined: int = 50
+    bans: int = 5
+    syncjobs: int = 20
+    tags: int = 30
+    latency: float = 0.0  # secondes, ajoutées à chaque réponse
+    failure_rate: float = 0.0  # proportion de réponses en erreur
+    failure_status: int = 500
+    seed: int = 0
+
+
+def make_mailbox(index: int, domains: int = 50) -> dict:
+    """Return a mailbox entry shaped like Mailcow's mailbox/all items."""
+    domain = f"domain{index % domains}.example"
+    return {
+        "username": f"user{index}@{domain}",
+        "name": f"User {index}",
+        "domain": domain,
+        "local_part": f"user{index}",
+        "active": 1,
+        "active_int": 1,
+        "quota": 3221225472,
+        "quota_used": 1024 * index,
+        "percent_in_use": index % 100,
+        "percent_class": "success",
+        "messages": index * 3,
+        "spam_aliases": 0,
+        "created": "2024-01-01 00:00:00",
+        "modified": "2024-06-01 12:00:00",
+        "last_imap_login": "1718000000",
+        "last_smtp_login": "1718000000",
+        "last_pop3_login": "0",
+        "attributes": {
+            "force_pw_update": "0",
+            "tls_enforce_in": "0",
+            "tls_enforce_out": "0",
+            "sogo_access": "1",
+            "imap_access": "1",
+            "pop3_access": "0",
+            "smtp_access": "1",
+            "quarantine_notification": "hourly",
+            "quarantine_category": "reject",
+        },
+        "rl": False,
+        "is_relayed": 0,
+    }
+
+
+def make_domain(index: int, mailboxes: int) -> dict:
+    return {
+        "domain_name": f"domain{index}.example",
+        "description": f"Domain {index}",
+        "active": 1,
+        "aliases_in_domain": 2,
+        "mboxes_in_domain": mailboxes,
+        "max_num_mboxes_for_domain": 100,
+        "bytes_total": 1024 * 1024 * mailboxes,
+        "msgs_total": 30 * mailboxes,
+        "max_quota_for_domain": 10737418240,
+        "quota_used_in_domain": str(1024 * 1024 * mailboxes),
+        "relayhost": "0",
+        "backupmx": 0,
+    }
+
+
+def make_container(index: int) -> tuple[str, dict]:
+    name = f"service{index}-mailcow"
+    return name, {
+        "type": "info",
+        "container": name,
+        "state": "running",
+        "started_at": "2024-06-01T12:00:00.123456789Z",
+        "image": f"mailcow/service{index}:1.0",
+    }
+
+
+def make_queued(index: int) -> dict:
+    return {
+        "queue_name": "deferred" if index % 3 == 0 else "active",
+        "queue_id": f"4Q{index:08X}",
+        "arrival_time": 1718000000 + index,
+        "message_size": 2048,
+        "forced_expire": False,
+        "sender": f"sender{index}@example.org",
+        "recipients": [f"user{index}@domain0.example"],
+    }
+
+
+def make_quarantined(index: int) -> dict:
+    return {
+        "id": index,
+        "qid": f"4Q{index:08X}",
+        "subject": f"Offer {index}",
+        "virus_flag": 0,
+        "score": 5 + index % 20,
+        "rcpt": f"user{index}@domain0.example",
+        "sender": f"spam{index}@example.net",
+        "action": "reject" if index % 2 else "add header",
+        "created": 1718000000 + index,
+        "notified": 0,
+    }
+
+
+def make_fail2ban(bans: int) -> dict:
+    active = [f"192.0.2.{index}/32" for index in range(bans)]
+    return {
+        "ban_time": 1800,
+        "max_attempts": 10,
+        "retry_window": 600,
+        "netban_ipv4": 32,
+        "netban_ipv6": 128,
+        "active_bans": [
+            {"network": network, "banned_until": "00h 29m 00s", "queued_for_unban": 0, "ip": network.split("/")[0]}
+            for network in active
+        ],
+        "perm_bans": [{"network": "198.51.100.0/24", "ip": "198.51.100.0"}],
+    }
+
+
+def make_syncjob(index: int) -> dict:
+    failed = index % 10 == 0
+    return {
+        "id": index + 1,
+        "user2": f"user{index}@domain0.example",
+        "host1": "imap.old.example",
+        "user1": f"user{index}@old.example",
+        "mins_interval": "20",
+        "port1": 993,
+        "enc1": "SSL",
+        "is_running": 0,
+        "last_run": "2024-06-01 12:00:00",
+        "success": 0 if failed else 1,
+        "exit_status": "EX_CONNECT_ERROR_HOST1" if failed else "EX_OK",
+        "created": "2024-05-01 12:00:00",
+        "modified": None,
+        "active": 1,
+    }
+
+
+def make_rspamd_entry(index: int) -> dict:
+    return {
+        "message-id": f"<{index}@example.org>",
+        "qid": f"4R{index:08X}",
+        "action": ("no action", "reject", "greylist", "add header")[index % 4],
+        "unix_time": 1718000000 + index,
+        "score": index % 15,
+        "required_score": 15,
+        "size": 4096,
+    }
+
+
+def make_postfix_entry(index: int) -> dict:
+    message = (
+        f"NOQUEUE: reject: RCPT from unknown[192.0.2.{index % 250}]"
+        if index % 5 == 0
+        else f"4P{index:08X}: to=<user{index}@domain0.example>, status=sent (250 OK)"
+    )
+    return {"time": str(1718000000 + index), "program": "postfix/smtpd", "priority": "info", "message": message}
+
+
+def build_payloads(config: FakeMailcowConfig) -> dict[str, bytes]:
+    """Encode every response body once, keyed by request path."""
+    per_domain = max(1, config.mailboxes // max(1, config.domains))
+    payloads = {
+        "status/version": {"version": VERSION},
+        "mailbox/all": [make_mailbox(i, config.domains) for i in range(config.mailboxes)],
+        "domain/all": [make_domain(i, per_domain) for i in range(config.domains)],
+        "status/vmail": {
+            "type": "info",
+            "disk": "/dev/sda1",
+            "used": "42G",
+            "total": "100G",
+            "used_percent": "42%",
+        },
+        "status/containers": dict(make_container(i) for i in range(config.containers)),
+        "mailq/all": [make_queued(i) for i in range(config.queued)],
+        "quarantine/all": [make_quarantined(i) for i in range(config.quarantined)],
+        "fail2ban": make_fail2ban(config.bans),
+        "syncjobs/all/no_log": [make_syncjob(i) for i in range(config.syncjobs)],
+        # Servis quel que soit le nombre demandé dans logs/<log>/<count>
+        "logs/rspamd-history": [make_rspamd_entry(i) for i in range(config.log_entries)],
+        "logs/postfix": [make_postfix_entry(i) for i in range(config.log_entries)],
+    }
+    bodies = {f"/api/v1/get/{path}": json.dumps(body).encode() for path, body in payloads.items()}
+    bodies[GITHUB_TAGS_PATH] = json.dumps(
+        [{"name": f"2024-{month:02d}", "commit": {"sha": "0" * 40}} for month in range(1, config.tags + 1)]
+    ).encode()
+    return bodies
+
+
+def create_app(config: FakeMailcowConfig | None = None) -> web.Application:
+    config = config or FakeMailcowConfig()
+    bodies = build_payloads(config)
+    rng = random.Random(config.seed)
+    etag = f'"tags-{config.tags}"'
+    stats = {"requests": 0, "failures": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        if request.path == GITHUB_TAGS_PATH:
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            return web.Response(
+                body=bodies[request.path],
+                content_type="application/json",
+                headers={"ETag": etag, "X-RateLimit-Remaining": "59"},
+            )
+        if request.headers.get("X-API-Key") != API_KEY:
+            return web.Response(status=401)
+        if config.failure_rate and rng.random() < config.failure_rate:
+            stats["failures"] += 1
+            return web.Response(status=config.failure_status, text="injected failure")
+        path = request.path
+        if path.startswith("/api/v1/get/logs/"):
+            path = path.rsplit("/", 1)[0]
+        body = bodies.get(path)
+        if body is None:
+            return web.Response(status=404)
+        return web.Response(body=body, content_type="application/json")
+
+    app = web.Application()
+    app[STATS_KEY] = stats
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+def self_signed_context(directory: Path) -> ssl.SSLContext | None:
+    """Create a throwaway certificate with the openssl CLI, or None if unavailable."""
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    try:
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", str(key), "-out", str(cert), "-days", "1",
+                "-subj", "/CN=localhost",
+            ],
+            check=True,
+            capture_output=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def start_server(
+    use_tls: bool = True, config: FakeMailcowConfig | None = None
+) -> tuple[web.AppRunner, str]:
+    """Start the stub on a free localhost port and return (runner, base_url)."""
+    context = None
+    if use_tls:
+        context = self_signed_context(Path(tempfile.mkdtemp()))
+    runner = web.AppRunner(create_app(config))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    scheme = "https" if context else "http"
+    return runner, f"{scheme}://127.0.0.1:{port}"
+
+
+def _serve_forever(config: FakeMailcowConfig | None, use_tls: bool, urls) -> None:
+    async def serve() -> None:
+        _, base_url = await start_server(use_tls, config)
+        urls.put(base_url)
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def start_server_process(
+    use_tls: bool = False, config: FakeMailcowConfig | None = None
+) -> tuple[multiprocessing.Process, str]:
+    """Run the stub in a child process, so its own work does not load the measured loop."""
+    context = multiprocessing.get_context("spawn")
+    urls = context.Queue()
+    process = context.Process(
+        target=_serve_forever, args=(config, use_tls, urls), daemon=True
+    )
+    process.start()
+    return process, urls.get(timeout=60)
@@ -1,19 +1,100 @@
 import logging
+from typing import Any
+import aiohttp
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-
-from .const import DOMAIN, PLATFORMS, CONF_SCAN_INTERVAL, CONF_DISABLE_CHECK_AT_NIGHT, CONF_BASE_URL, CONF_API_KEY
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.ssl import client_context
+
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    CONF_SCAN_INTERVAL,
+    CONF_DISABLE_CHECK_AT_NIGHT,
+    CONF_BASE_URL,
+    CONF_API_KEY,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_CONTAINERS_SCAN_INTERVAL,
+    CONF_VERSION_SCAN_INTERVAL,
+    CONF_MAILBOX_SENSORS,
+    CONF_DEDICATED_SESSION,
+    CONF_LOG_SENSORS,
+    CONF_DOMAIN_SENSORS,
+    CONF_SECURITY_SENSORS,
+    CONF_SYNCJOB_SENSORS,
+    CONF_WEBHOOK,
+    CONF_QUIET_WINDOWS,
+    CONF_ADAPTIVE_POLLING,
+    DEDICATED_SESSION_CONNECTION_LIMIT,
+    DEDICATED_SESSION_DNS_CACHE_TTL,
+    DEDICATED_SESSION_KEEPALIVE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_CONTAINERS_SCAN_INTERVAL,
+    DEFAULT_VERSION_SCAN_INTERVAL,
+)
 from .coordinator import MailcowCoordinator
-from .api import MailcowAPI
+from .entity import async_track_device_version
+from .api import MailcowAPI, REQUEST_TIMEOUT
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Coordinateurs partagés par les entrées pointant vers la même URL Mailcow
+DATA_POLLERS = f"{DOMAIN}_pollers"
+
+# Options à partir desquelles le poller est construit, avec leur valeur par défaut
+POLLER_OPTIONS: dict[str, Any] = {
+    CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
+    CONF_DISABLE_CHECK_AT_NIGHT: False,
+    CONF_MAX_CONCURRENT_REQUESTS: DEFAULT_MAX_CONCURRENT_REQUESTS,
+    CONF_CONTAINERS_SCAN_INTERVAL: DEFAULT_CONTAINERS_SCAN_INTERVAL,
+    CONF_VERSION_SCAN_INTERVAL: DEFAULT_VERSION_SCAN_INTERVAL,
+    CONF_MAILBOX_SENSORS: False,
+    CONF_DEDICATED_SESSION: False,
+    CONF_LOG_SENSORS: False,
+    CONF_DOMAIN_SENSORS: False,
+    CONF_SECURITY_SENSORS: False,
+    CONF_SYNCJOB_SENSORS: False,
+    CONF_WEBHOOK: False,
+    CONF_QUIET_WINDOWS: None,
+    CONF_ADAPTIVE_POLLING: True,
+}
+
+
+def _poller_key(base_url: str, api_key: str, options: dict[str, Any]) -> tuple:
+    """Entries share a poller only with the same server, API key and polling options."""
+    return (base_url.strip().rstrip("/").lower(), api_key, tuple(options.values()))
+
+
+def _create_dedicated_session(api_key: str) -> aiohttp.ClientSession:
+    """Create a keep-alive session reserved to one Mailcow entry."""
+    connector = aiohttp.TCPConnector(
+        limit=DEDICATED_SESSION_CONNECTION_LIMIT,
+        ttl_dns_cache=DEDICATED_SESSION_DNS_CACHE_TTL,
+        keepalive_timeout=DEDICATED_SESSION_KEEPALIVE,
+        ssl=client_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={"X-API-Key": api_key, "Accept": "application/json"},
+        timeout=REQUEST_TIMEOUT,
+    )
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Mailcow services."""
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Mailcow from a config entry."""
     _LOGGER.debug(f"Setting up Mailcow entry {entry.entry_id}")
-    session = async_get_clientsession(hass)
 
     base_url = entry.data.get(CONF_BASE_URL)
     api_key = entry.options.get(CONF_API_KEY) or entry.data.get(CONF_API_KEY)
@@ -22,23 +103,64 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Missing base_url or api_key in config entry")
         return False
 
-    api = MailcowAPI({"base_url": base_url, "api_key": api_key}, session)
-
-    coordinator = MailcowCoordinator(
-        hass,
-        api,
-        entry.options.get(CONF_SCAN_INTERVAL, 10),
-        entry.options.get(CONF_DISABLE_CHECK_AT_NIGHT, False),
-        entry.entry_id,
-        base_url,
-        session
-    )
-    await coordinator.async_config_entry_first_refresh()
-
+    options = {option: entry.options.get(option, default) for option, default in POLLER_OPTIONS.items()}
+    pollers: dict[tuple, MailcowCoordinator] = hass.data.setdefault(DATA_POLLERS, {})
+    poller_key = _poller_key(base_url, api_key, options)
+    coordinator = pollers.get(poller_key)
+
+    if coordinator is None:
+        dedicated_session = options[CONF_DEDICATED_SESSION]
+        if dedicated_session:
+            session = _create_dedicated_session(api_key)
+        else:
+            session = async_get_clientsession(hass)
+
+        api = MailcowAPI(
+            {"base_url": base_url, "api_key": api_key}, session, owns_session=dedicated_session
+        )
+        api.close_on_hass_close(hass)
+
+        coordinator = MailcowCoordinator(
+            hass,
+            api,
+            options[CONF_SCAN_INTERVAL],
+            options[CONF_DISABLE_CHECK_AT_NIGHT],
+            entry.entry_id,
+            base_url,
+            options[CONF_MAX_CONCURRENT_REQUESTS],
+            options[CONF_CONTAINERS_SCAN_INTERVAL],
+            options[CONF_VERSION_SCAN_INTERVAL],
+            mailbox_sensors=options[CONF_MAILBOX_SENSORS],
+            log_sensors=options[CONF_LOG_SENSORS],
+            domain_sensors=options[CONF_DOMAIN_SENSORS],
+            security_sensors=options[CONF_SECURITY_SENSORS],
+            syncjob_sensors=options[CONF_SYNCJOB_SENSORS],
+            push_updates=options[CONF_WEBHOOK],
+            quiet_windows=options[CONF_QUIET_WINDOWS],
+            adaptive_polling=options[CONF_ADAPTIVE_POLLING],
+        )
+        # Démarrage immédiat depuis le dernier instantané, rafraîchi en arrière-plan
+        await coordinator.async_restore_snapshot()
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"mailcow_first_refresh_{entry.entry_id}"
+        )
+        pollers[poller_key] = coordinator
+    else:
+        _LOGGER.debug(f"Sharing the Mailcow poller of {base_url} with entry {entry.entry_id}")
+
+    coordinator.entry_ids.add(entry.entry_id)
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    if entry.options.get(CONF_WEBHOOK, False):
+        # Importé seulement si le webhook est activé
+        from .push import async_register_push_webhook
+
+        async_register_push_webhook(hass, entry, coordinator)
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Après la création de l'appareil par les plateformes
+    async_track_device_version(hass, entry, coordinator)
     _LOGGER.info(f"Mailcow entry {entry.entry_id} set up successfully")
     return True
 
@@ -47,7 +169,17 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     _LOGGER.debug(f"Unloading Mailcow entry {entry.entry_id}")
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if coordinator is not None:
+            coordinator.entry_ids.discard(entry.entry_id)
+            coordinator.device_infos.pop(entry.entry_id, None)
+            if not coordinator.entry_ids:
+                # Dernière entrée attachée : on arrête le poller partagé
+                pollers = hass.data[DATA_POLLERS]
+                for key in [key for key, poller in pollers.items() if poller is coordinator]:
+                    del pollers[key]
+                await coordinator.async_shutdown()
+                await coordinator.api.async_close()
         _LOGGER.info(f"Mailcow entry {entry.entry_id} unloaded successfully")
     return unload_ok
 
@@ -1,50 +1,198 @@
 """API client for Mailcow."""
 import asyncio
+import random
+import time
+from datetime import tzinfo
+from urllib.parse import urlparse
 from aiohttp import ClientSession, ClientError, ClientTimeout
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import json_loads
 from .const import CONF_API_KEY, CONF_BASE_URL
-from typing import Any, Optional, List, Dict, Union
+from typing import Any, Callable, Optional, List, Dict, Union
+from .jsonstream import JsonArrayCounter
+from .metrics import MetricsRegistry, RequestSample
+from .models import (
+    DomainSummary,
+    Fail2banSummary,
+    MailboxRecord,
+    MailQueueSummarizer,
+    MailQueueSummary,
+    QuarantineSummarizer,
+    QuarantineSummary,
+    SyncJobSummary,
+    index_mailboxes,
+    summarize_domains,
+    summarize_fail2ban,
+    summarize_syncjobs,
+)
+from .circuit_breaker import get_circuit_breaker
 from .exceptions import (
     MailcowAPIError,
     MailcowAuthenticationError,
-    MailcowConnectionError
+    MailcowCircuitOpenError,
+    MailcowConnectionError,
+    MailcowServerError,
 )
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+# Au-delà, le décodage JSON bloquerait la boucle d'événements plusieurs millisecondes
+EXECUTOR_DECODE_THRESHOLD = 128 * 1024
+EXECUTOR_INDEX_THRESHOLD = 1000  # boîtes aux lettres ou tâches de synchronisation
+
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5  # secondes
+RETRY_MAX_DELAY = 5.0
+
+REQUEST_TIMEOUT = ClientTimeout(total=15)
+
 class MailcowAPI:
     """Asynchronous Mailcow API client."""
 
-    def __init__(self, config_data: dict, session: ClientSession):
+    def __init__(self, config_data: dict, session: ClientSession, owns_session: bool = False):
         self._base_url = config_data[CONF_BASE_URL].rstrip("/")
         self._api_key = config_data[CONF_API_KEY]
         self._session = session
-
-    async def _get(self, endpoint: str) -> Any:
-        """Generic GET request to Mailcow API."""
-        url = f"{self._base_url}/api/v1/get/{endpoint}"
-        headers = {
-            "X-API-Key": self._api_key,
-            "Accept": "application/json",
+        self._owns_session = owns_session
+        # Une session dédiée porte déjà en-têtes et délai d'expiration par défaut
+        self._request_options: Dict[str, Any] = {} if owns_session else {
+            "headers": {
+                "X-API-Key": self._api_key,
+                "Accept": "application/json",
+            },
+            "timeout": REQUEST_TIMEOUT,
         }
-        timeout = ClientTimeout(total=15)
+        self._unsub_hass_close: Optional[Callable[[], None]] = None
+        self.breaker = get_circuit_breaker(urlparse(self._base_url).netloc or self._base_url)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        # Latence, taille et temps de décodage par endpoint, chaque tentative comptée
+        self.metrics = MetricsRegistry()
+
+    async def _get(
+        self,
+        endpoint: str,
+        count_only: bool = False,
+        on_item: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Generic GET request to Mailcow API.
+
+        Connection errors, timeouts and 5xx responses are retried with
+        jittered exponential backoff; calls are refused while the host's
+        circuit breaker is open.
+
+        With count_only, the body is stream-parsed and only the number of
+        top-level array elements is returned (None if it is not an array).
+        on_item implies count_only and receives each element as it is decoded.
+        """
+        if not self.breaker.allow_request():
+            raise MailcowCircuitOpenError(
+                f"Mailcow API unavailable, circuit open for {self.breaker.host}"
+            )
 
+        self.stats["requests"] += 1
+        # Les éléments déjà transmis à on_item ne peuvent pas être rejoués
+        attempts = 1 if on_item is not None else MAX_ATTEMPTS
+        settled = False
         try:
-            async with self._session.get(url, headers=headers, timeout=timeout) as response:
+            for attempt in range(1, attempts + 1):
+                sample = RequestSample()
+                started = time.monotonic()
+                try:
+                    result = await self._request_once(
+                        "GET", f"get/{endpoint}", count_only, on_item, sample=sample
+                    )
+                except (MailcowConnectionError, MailcowServerError) as err:
+                    self.metrics.record(endpoint, time.monotonic() - started, sample, err)
+                    if attempt == attempts:
+                        self.stats["failures"] += 1
+                        settled = True
+                        self.breaker.record_failure()
+                        raise
+                    delay = random.uniform(
+                        0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+                    )
+                    self.stats["retries"] += 1
+                    _LOGGER.debug(
+                        "Retrying %s in %.2fs (attempt %s/%s): %s",
+                        endpoint, delay, attempt + 1, attempts, err,
+                    )
+                    await asyncio.sleep(delay)
+                except MailcowAPIError as err:
+                    self.metrics.record(endpoint, time.monotonic() - started, sample, err)
+                    # Le serveur a répondu : l'hôte est joignable
+                    self.stats["failures"] += 1
+                    settled = True
+                    self.breaker.record_success()
+                    raise
+                else:
+                    self.metrics.record(endpoint, time.monotonic() - started, sample)
+                    settled = True
+                    self.breaker.record_success()
+                    return result
+        finally:
+            if not settled:
+                # Annulé (pendant une requête ou un délai de nouvelle tentative) ou
+                # erreur inattendue : l'essai demi-ouvert ne doit pas rester bloqué
+                self.breaker.release_trial()
+
+    async def _request_once(
+        self,
+        method: str,
+        path: str,
+        count_only: bool = False,
+        on_item: Optional[Callable[[Any], None]] = None,
+        payload: Any = None,
+        sample: Optional[RequestSample] = None,
+    ) -> Any:
+        url = f"{self._base_url}/api/v1/{path}"
+        if sample is None:
+            sample = RequestSample()
+
+        try:
+            async with self._session.request(
+                method, url, json=payload, **self._request_options
+            ) as response:
+                sample.status = response.status
                 if response.status in (401, 403):
-                    _LOGGER.error("Authentication failed for endpoint %s", endpoint)
+                    _LOGGER.error("Authentication failed for endpoint %s", path)
                     raise MailcowAuthenticationError("Invalid API key or permission denied")
                 elif response.status >= 500:
                     body = await response.text()
                     _LOGGER.error("Server error %s from %s: %s", response.status, url, body)
-                    raise MailcowAPIError(f"Server error {response.status}")
+                    raise MailcowServerError(f"Server error {response.status}")
                 elif response.status >= 400:
                     body = await response.text()
                     _LOGGER.error("Client error %s from %s: %s", response.status, url, body)
                     raise MailcowAPIError(f"Client error {response.status}")
 
                 try:
-                    return await response.json()
+                    if count_only or on_item is not None:
+                        counter = JsonArrayCounter(on_item)
+                        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                            sample.size += len(chunk)
+                            parse_started = time.perf_counter()
+                            counter.feed(chunk)
+                            sample.parse_time += time.perf_counter() - parse_started
+                        return counter.close()
+                    body = await response.read()
+                    sample.size = len(body)
+                    if not body.strip():
+                        return None
+                    parse_started = time.perf_counter()
+                    try:
+                        if len(body) >= EXECUTOR_DECODE_THRESHOLD:
+                            return await asyncio.get_running_loop().run_in_executor(
+                                None, json_loads, body
+                            )
+                        return json_loads(body)
+                    finally:
+                        sample.parse_time = time.perf_counter() - parse_started
+                except (ClientError, asyncio.TimeoutError):
+                    raise
                 except Exception as e:
                     _LOGGER.error("Failed to parse JSON from %s: %s", url, e)
                     raise MailcowAPIError("Invalid JSON response") from e
@@ -57,17 +205,113 @@ class MailcowAPI:
             _LOGGER.error("Timeout when connecting to %s", url)
             raise MailcowConnectionError("Connection timed out")
 
+        except MailcowAPIError:
+            raise
+
         except Exception as ex:
             _LOGGER.exception("Unexpected error while calling Mailcow API: %s", ex)
             raise MailcowAPIError("Unexpected error occurred") from ex
 
+    async def _post(self, endpoint: str, payload: Any) -> Any:
+        """POST an action to the Mailcow API (never retried: not idempotent)."""
+        if not self.breaker.allow_request():
+            raise MailcowCircuitOpenError(
+                f"Mailcow API unavailable, circuit open for {self.breaker.host}"
+            )
+        try:
+            result = await self._request_once("POST", endpoint, payload=payload)
+        except (MailcowConnectionError, MailcowServerError):
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release_trial()
+            raise
+        except MailcowAPIError:
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+
+        # Mailcow répond par une liste de messages {"type": "success"|"danger", "msg": ...}
+        messages = result if isinstance(result, list) else [result]
+        for message in messages:
+            if isinstance(message, dict) and message.get("type") in ("danger", "error"):
+                raise MailcowAPIError(f"Mailcow refused {endpoint}: {message.get('msg')}")
+        return result
+
+    def close_on_hass_close(self, hass: HomeAssistant) -> None:
+        """Close an owned session when Home Assistant stops, as entries are not unloaded then."""
+        if not self._owns_session:
+            return
+
+        async def _async_close(event: Event) -> None:
+            self._unsub_hass_close = None
+            await self.async_close()
+
+        self._unsub_hass_close = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close)
+
+    async def async_close(self) -> None:
+        """Close the HTTP session if this client created it."""
+        if self._unsub_hass_close is not None:
+            self._unsub_hass_close()
+            self._unsub_hass_close = None
+        if self._owns_session and not self._session.closed:
+            await self._session.close()
+
     async def get_mailbox_count(self) -> Optional[int]:
+        return await self._get("mailbox/all", count_only=True)
+
+    async def get_mailboxes(self) -> Optional[Dict[str, MailboxRecord]]:
+        """Return every mailbox from one mailbox/all call, indexed by username."""
         data = await self._get("mailbox/all")
-        return len(data) if isinstance(data, list) else None
+        if isinstance(data, list) and len(data) >= EXECUTOR_INDEX_THRESHOLD:
+            # Des dizaines de milliers d'enregistrements : construits hors de la boucle
+            return await asyncio.get_running_loop().run_in_executor(None, index_mailboxes, data)
+        return index_mailboxes(data)
 
     async def get_domain_count(self) -> Optional[int]:
-        data = await self._get("domain/all")
-        return len(data) if isinstance(data, list) else None
+        return await self._get("domain/all", count_only=True)
+
+    async def get_domains(self) -> Optional[DomainSummary]:
+        """Return every domain from one domain/all call, with the totals."""
+        return summarize_domains(await self._get("domain/all"))
+
+    async def get_syncjobs(self, time_zone: tzinfo) -> Optional[SyncJobSummary]:
+        """Return every sync job from one syncjobs/all call, indexed by id."""
+        # no_log : sans la sortie imapsync de chaque tâche, souvent volumineuse
+        data = await self._get("syncjobs/all/no_log")
+        now = dt_util.utcnow()
+        if isinstance(data, list) and len(data) >= EXECUTOR_INDEX_THRESHOLD:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, summarize_syncjobs, data, now, time_zone
+            )
+        return summarize_syncjobs(data, now, time_zone)
+
+    async def stream_logs(
+        self, log: str, count: int, on_item: Callable[[Any], None]
+    ) -> Optional[int]:
+        """Stream the last count entries of a Mailcow log (newest first) to on_item."""
+        return await self._get(f"logs/{log}/{count}", on_item=on_item)
+
+    async def get_mail_queue(self) -> MailQueueSummary:
+        """Summarise mailq/all in a single streamed pass."""
+        summarizer = MailQueueSummarizer()
+        await self._get("mailq/all", on_item=summarizer.add)
+        return summarizer.summary()
+
+    async def get_quarantine(self) -> QuarantineSummary:
+        """Summarise quarantine/all in a single streamed pass."""
+        summarizer = QuarantineSummarizer()
+        await self._get("quarantine/all", on_item=summarizer.add)
+        return summarizer.summary()
+
+    async def get_fail2ban(self) -> Fail2banSummary:
+        return summarize_fail2ban(await self._get("fail2ban"))
+
+    async def flush_mail_queue(self) -> None:
+        await self._post("edit/mailq", {"action": "flush"})
+
+    async def delete_mail_queue(self) -> None:
+        await self._post("delete/mailq", {"action": "super_delete"})
 
     async def get_status_version(self) -> Optional[str]:
         data = await self._get("status/version")
@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+import logging
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+    BinarySensorEntityDescription,
+)
+
+from .const import DOMAIN
+from .entity import MailcowEntity, MailcowEntityDescription, async_track_description_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class MailcowBinarySensorEntityDescription(MailcowEntityDescription, BinarySensorEntityDescription):
+    """Describes a Mailcow binary sensor."""
+
+
+CONTAINER_BINARY_SENSOR_TYPES: tuple[MailcowBinarySensorEntityDescription, ...] = (
+    MailcowBinarySensorEntityDescription(
+        key="container",
+        name="Mailcow {item}",
+        icon="mdi:docker",
+        device_class=BinarySensorDeviceClass.RUNNING,
+        items_fn=lambda coordinator: coordinator.data.get("containers"),
+        value_fn=lambda record: record.running,
+        attributes_fn=lambda record: {"state": record.state, "image": record.image},
+        stale_key="containers_status",
+    ),
+)
+
+
+class MailcowBinarySensor(MailcowEntity, BinarySensorEntity):
+    """Mailcow binary sensor whose state is extracted once per coordinator update."""
+
+    @property
+    def is_on(self):
+        return self._value
+
+
+async def async_setup_entry(hass, config_entry, async_add_entities):
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_track_description_entities(
+        hass,
+        config_entry,
+        coordinator,
+        CONTAINER_BINARY_SENSOR_TYPES,
+        MailcowBinarySensor,
+        async_add_entities,
+    )
@@ -0,0 +1,100 @@
+"""Per-host circuit breaker for the Mailcow API client."""
+import time
+from typing import Any
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 60  # secondes
+# Au-delà, un essai demi-ouvert sans issue est considéré comme perdu ; couvre
+# les MAX_ATTEMPTS tentatives de l'API et leurs délais
+TRIAL_TIMEOUT = 120  # secondes
+
+_BREAKERS: dict[str, "CircuitBreaker"] = {}
+
+
+def get_circuit_breaker(host: str) -> "CircuitBreaker":
+    """Return the breaker shared by every client talking to host."""
+    breaker = _BREAKERS.get(host)
+    if breaker is None:
+        breaker = _BREAKERS[host] = CircuitBreaker(host)
+    return breaker
+
+
+class CircuitBreaker:
+    """Stop calling a host after repeated failures, then probe it with one request.
+
+    Closed: requests flow. After FAILURE_THRESHOLD consecutive failed calls
+    the breaker opens and rejects requests for RESET_TIMEOUT seconds; it then
+    lets a single trial request through (half-open) and closes again if it
+    succeeds. A trial that reports no outcome within TRIAL_TIMEOUT seconds is
+    given up and the next request probes the host instead.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        trial_timeout: float = TRIAL_TIMEOUT,
+    ) -> None:
+        self.host = host
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._trial_timeout = trial_timeout
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_count = 0
+        self.rejected_count = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == STATE_CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == STATE_OPEN and now - self._opened_at >= self._reset_timeout:
+            self.state = STATE_HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == STATE_HALF_OPEN and (
+            not self._trial_in_flight or now - self._trial_started_at >= self._trial_timeout
+        ):
+            self._trial_in_flight = True
+            self._trial_started_at = now
+            return True
+        self.rejected_count += 1
+        return False
+
+    def record_success(self) -> None:
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self._failure_threshold:
+            if self.state != STATE_OPEN:
+                self.opened_count += 1
+            self.state = STATE_OPEN
+            self._opened_at = time.monotonic()
+
+    def release_trial(self) -> None:
+        """Forget an interrupted half-open trial so another request may probe the host."""
+        self._trial_in_flight = False
+
+    def as_dict(self) -> dict[str, Any]:
+        retry_in = 0.0
+        if self.state == STATE_OPEN:
+            retry_in = max(0.0, self._reset_timeout - (time.monotonic() - self._opened_at))
+        return {
+            "host": self.host,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_count": self.opened_count,
+            "rejected_count": self.rejected_count,
+            "retry_in": round(retry_in, 1),
+        }
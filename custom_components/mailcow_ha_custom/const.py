@@ -5,5 +5,31 @@ CONF_API_KEY = "api_key"
 CONF_BASE_URL = "base_url"
 CONF_DISABLE_CHECK_AT_NIGHT = "disable_check_at_night"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_CONTAINERS_SCAN_INTERVAL = "containers_scan_interval"
+CONF_VERSION_SCAN_INTERVAL = "version_scan_interval"
+CONF_MAILBOX_SENSORS = "mailbox_sensors"
+CONF_DEDICATED_SESSION = "dedicated_session"
+CONF_LOG_SENSORS = "log_sensors"
+CONF_DOMAIN_SENSORS = "domain_sensors"
+CONF_SECURITY_SENSORS = "security_sensors"
+CONF_SYNCJOB_SENSORS = "syncjob_sensors"
+CONF_WEBHOOK = "webhook"
+CONF_WEBHOOK_ID = "webhook_id"
+CONF_QUIET_WINDOWS = "quiet_windows"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
 
-PLATFORMS = ["sensor", "update"]
+DEFAULT_SCAN_INTERVAL = 10
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_CONTAINERS_SCAN_INTERVAL = 60  # secondes
+DEFAULT_VERSION_SCAN_INTERVAL = 6  # heures
+
+# Session HTTP dédiée par entrée
+DEDICATED_SESSION_CONNECTION_LIMIT = 10
+DEDICATED_SESSION_DNS_CACHE_TTL = 300  # secondes
+DEDICATED_SESSION_KEEPALIVE = 75  # secondes
+
+# Déclenché quand l'ensemble des réseaux bannis par fail2ban change
+EVENT_BANS_CHANGED = f"{DOMAIN}_bans_changed"
+
+PLATFORMS = ["binary_sensor", "sensor", "update"]
@@ -1,17 +1,58 @@
-from datetime import timedelta
+import asyncio
+from datetime import datetime, timedelta, tzinfo
+import hashlib
 import logging
 from homeassistant.util import dt as dt_util
-from typing import Any
-import aiohttp
-from aiohttp import ClientTimeout
+from typing import Any, Awaitable, Callable
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .const import (
+    DOMAIN,
+    EVENT_BANS_CHANGED,
+    DEFAULT_CONTAINERS_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_VERSION_SCAN_INTERVAL,
+)
+from .github import async_get_github_cache
+from .forecast import UsageHistory, parse_size
+from .metrics import EndpointMetrics
+from .models import MailQueueSummarizer, index_containers, merge_containers
+from .polling import DEFAULT_QUIET_WINDOWS, PollingPolicy, parse_quiet_windows
+
 _LOGGER = logging.getLogger(__name__)
 
-async def is_night_time(hass) -> bool:
-    tz = await dt_util.async_get_time_zone(str(hass.config.time_zone))
-    now = dt_util.now(tz)  # aware
-    return now.hour >= 23 or now.hour < 5
+# Avec le webhook, l'interrogation des conteneurs et de la file ne sert plus qu'à réconcilier
+PUSH_RECONCILE_INTERVAL = timedelta(minutes=15)
+PUSHED_KEYS = ("containers_status", "mail_queue")
+
+# Marge pour qu'une clé arrivant à échéance juste après un tick ne soit pas repoussée d'un tick
+SCHEDULE_TOLERANCE = timedelta(seconds=5)
+
+SNAPSHOT_VERSION = 1
+# Écriture au plus tard SNAPSHOT_SAVE_DELAY après le premier changement : les
+# rafraîchissements suivants ne la repoussent pas (voir _async_save_snapshot)
+SNAPSHOT_SAVE_DELAY = 60  # secondes
+# Clés sérialisables en JSON conservées entre deux démarrages
+SNAPSHOT_KEYS = (
+    "version",
+    "mailbox_count",
+    "domain_count",
+    "vmail_status",
+    "containers_status",
+    "latest_version",
+)
+
+
+def _state_signature(data: dict[str, Any]) -> tuple[Any, Any]:
+    """Container states and deferred queue size, the changes worth reacting to quickly."""
+    containers = data.get("containers") or {}
+    queue = data.get("mail_queue")
+    return (
+        {name: container.state for name, container in containers.items()},
+        queue.deferred if queue is not None else None,
+    )
 
 class MailcowCoordinator(DataUpdateCoordinator):
     def __init__(
@@ -22,54 +63,388 @@ class MailcowCoordinator(DataUpdateCoordinator):
         disable_check_at_night: bool,
         entry_id: str,
         base_url: str,
-        session: aiohttp.ClientSession,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        containers_scan_interval: int = DEFAULT_CONTAINERS_SCAN_INTERVAL,
+        version_scan_interval: int = DEFAULT_VERSION_SCAN_INTERVAL,
+        mailbox_sensors: bool = False,
+        log_sensors: bool = False,
+        domain_sensors: bool = False,
+        security_sensors: bool = False,
+        syncjob_sensors: bool = False,
+        push_updates: bool = False,
+        quiet_windows: str | None = None,
+        adaptive_polling: bool = True,
     ):
+        scan = timedelta(minutes=scan_interval)
+        containers = timedelta(seconds=containers_scan_interval)
+        version = timedelta(hours=version_scan_interval)
+        # Intervalle de rafraîchissement propre à chaque clé de données
+        self._intervals: dict[str, timedelta] = {
+            "version": version,
+            "mailbox_count": scan,
+            "domain_count": scan,
+            "vmail_status": scan,
+            "containers_status": containers,
+            "mail_queue": containers,
+            "latest_version": version,
+        }
+        if push_updates:
+            for key in PUSHED_KEYS:
+                self._intervals[key] = max(self._intervals[key], PUSH_RECONCILE_INTERVAL)
+        self._base_interval = min(self._intervals.values())
         super().__init__(
             hass,
             _LOGGER,
             name="Mailcow Coordinator",
-            update_interval=timedelta(minutes=scan_interval),
+            # Partagé entre plusieurs entrées : non rattaché à une entrée en particulier
+            config_entry=None,
+            # Le coordinateur se réveille au rythme de la clé la plus fréquente
+            update_interval=self._base_interval,
         )
         self.api = api
-        self.disable_check_at_night = disable_check_at_night
+        if not quiet_windows and disable_check_at_night:
+            # Ancienne option : la fenêtre 23h-5h codée en dur devient une fenêtre calme
+            quiet_windows = DEFAULT_QUIET_WINDOWS
+        self.policy = PollingPolicy(parse_quiet_windows(quiet_windows or ""), adaptive_polling)
         self.entry_id = entry_id
+        # Entrées de configuration attachées à ce poller (comptage de références)
+        self.entry_ids: set[str] = set()
+        # Appareil de chaque entrée, construit une fois (voir entity.entry_device_info)
+        self.device_infos: dict[str, Any] = {}
         self._base_url = base_url
-        self._cached_latest_version: str | None = None
-        self._session = session
-
-    async def _fetch_latest_github_version(self) -> str:
-        github_url = "https://api.github.com/repos/mailcow/mailcow-dockerized/tags"
-        try:
-            timeout = ClientTimeout(total=10)
-            async with self._session.get(github_url, timeout=timeout) as response:
-                if response.status == 200:
-                    tags = await response.json()
-                    if tags:
-                        sorted_tags = sorted(tags, key=lambda x: x["name"], reverse=True)
-                        return sorted_tags[0].get("name", "unknown")
-        except Exception as e:
-            _LOGGER.error(f"Error fetching GitHub version: {e}")
-        return "unknown"
+        self._github = async_get_github_cache(hass)
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_requests))
+        # Clés dont la dernière récupération a échoué (valeur précédente conservée)
+        self.stale_keys: set[str] = set()
+        self._fetchers: dict[str, Callable[[], Awaitable[Any]]] = {
+            "version": self.api.get_status_version,
+            "mailbox_count": self.api.get_mailbox_count,
+            "domain_count": self.api.get_domain_count,
+            "vmail_status": self.api.get_status_vmail,
+            "containers_status": self.api.get_status_containers,
+            "mail_queue": self.api.get_mail_queue,
+        }
+        # Vérification GitHub hors du rafraîchissement : sans accès Internet, elle
+        # attendrait son délai d'expiration avant que les données Mailcow n'arrivent
+        self._github_task: asyncio.Task | None = None
+        # Occupation du volume vmail, échantillonnée pour la prévision de remplissage
+        self._vmail_history = UsageHistory()
+        # Clés calculées à partir d'une autre clé récupérée
+        self._derived: dict[str, tuple[str, Callable[[Any], Any]]] = {
+            "containers": ("containers_status", index_containers),
+            "vmail_forecast": ("vmail_status", self._vmail_forecast),
+        }
+        self.mailbox_sensors = mailbox_sensors
+        if mailbox_sensors:
+            # Un seul mailbox/all complet alimente le compteur et les capteurs par boîte
+            del self._fetchers["mailbox_count"]
+            self._fetchers["mailboxes"] = self.api.get_mailboxes
+            self._intervals["mailboxes"] = scan
+            self._derived["mailbox_count"] = ("mailboxes", len)
+        self.domain_sensors = domain_sensors
+        if domain_sensors:
+            # domain/all complet : capteurs par domaine, totaux et compteur en un appel
+            del self._fetchers["domain_count"]
+            self._fetchers["domains"] = self.api.get_domains
+            self._intervals["domains"] = scan
+            self._derived["domain_count"] = ("domains", len)
+        self.security_sensors = security_sensors
+        if security_sensors:
+            # Interrogés au même cycle que les autres statuts, sous le même plafond de requêtes
+            self._fetchers["quarantine"] = self.api.get_quarantine
+            self._fetchers["fail2ban"] = self.api.get_fail2ban
+            self._intervals["quarantine"] = scan
+            self._intervals["fail2ban"] = scan
+        self.syncjob_sensors = syncjob_sensors
+        if syncjob_sensors:
+            # Un seul syncjobs/all indexé par id alimente les capteurs par tâche et les agrégats
+            self._fetchers["syncjobs"] = self._fetch_syncjobs
+            self._intervals["syncjobs"] = scan
+        self.log_sensors = log_sensors
+        if log_sensors:
+            from .logstats import PostfixLogCursor, RspamdHistoryCursor
+
+            self._log_cursors = (RspamdHistoryCursor(), PostfixLogCursor())
+            self._fetchers["log_stats"] = self._fetch_log_stats
+            self._intervals["log_stats"] = scan
+        self._next_due: dict[str, datetime] = {}
+        self._time_zone_resolved = False
+        self._time_zone: tzinfo = dt_util.UTC
+        # Par serveur : les pollers d'un même Mailcow aux options différentes
+        # reprennent le même instantané (et l'historique vmail)
+        url_hash = hashlib.sha1(base_url.encode()).hexdigest()[:12]
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_VERSION, f"{DOMAIN}.snapshot_{url_hash}"
+        )
+        self._snapshot_pending = False
+        self._saved_signature: tuple[Any, ...] | None = None
+        # Valeurs restaurées servies malgré une panne totale, jusqu'à la fin de
+        # la première tentative de rafraîchissement qui suit la restauration
+        self._serve_restored = False
+
+    @callback
+    def _async_schedule_github_check(self, now: datetime) -> None:
+        """Start the GitHub tags check in the background when it is due."""
+        if self._github_task is not None and not self._github_task.done():
+            return
+        if "latest_version" in (self.data or {}) and self._next_due.get(
+            "latest_version", now
+        ) > now + SCHEDULE_TOLERANCE:
+            return
+        self._github_task = self.hass.async_create_background_task(
+            self._async_check_latest_version(), f"mailcow_github_check_{self.entry_id}"
+        )
+
+    async def _async_check_latest_version(self) -> None:
+        version = await self._github.async_get_latest_version()
+        self._next_due["latest_version"] = dt_util.utcnow() + self._intervals["latest_version"]
+        data = self.data or {}
+        if data.get("latest_version") == version:
+            return
+        # Pas de async_set_updated_data : l'état de succès du dernier
+        # rafraîchissement Mailcow et sa planification restent inchangés
+        self.data = {**data, "latest_version": version}
+        self.async_update_listeners()
+        self._async_save_snapshot()
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        if self._github_task is not None:
+            self._github_task.cancel()
+
+    def _vmail_forecast(self, status: dict[str, Any]) -> Any:
+        return self._vmail_history.forecast(parse_size(status.get("total")))
+
+    def _record_vmail_sample(self, status: Any, now: datetime) -> None:
+        used = parse_size(status.get("used")) if isinstance(status, dict) else None
+        if used is not None:
+            self._vmail_history.add(now.timestamp(), used)
+
+    def endpoint_metrics(self) -> dict[str, EndpointMetrics]:
+        """Request metrics of every Mailcow endpoint polled so far, plus GitHub."""
+        return {**self.api.metrics.endpoints, **self._github.metrics.endpoints}
+
+    async def _fetch_syncjobs(self) -> Any:
+        return await self.api.get_syncjobs(self._time_zone)
+
+    async def _fetch_log_stats(self) -> dict[str, Any]:
+        """Count log activity since the previous poll, from the new entries only."""
+        from .logstats import LOG_COUNTERS
+
+        for cursor in self._log_cursors:
+            cursor.begin()
+        await asyncio.gather(
+            *(self.api.stream_logs(c.log, c.window, c.add) for c in self._log_cursors)
+        )
+        stats: dict[str, Any] = dict.fromkeys(LOG_COUNTERS, 0)
+        for cursor in self._log_cursors:
+            for name, value in cursor.commit().items():
+                stats[name] += value
+        stats["window_overflow"] = any(c.overflow for c in self._log_cursors)
+        if stats["window_overflow"]:
+            _LOGGER.debug("Log window full of new entries; consider a shorter scan interval")
+        return stats
+
+    async def async_restore_snapshot(self) -> bool:
+        """Fill data from the last saved snapshot, every key marked stale.
+
+        Returns False when there is no snapshot; data is then an empty dict so
+        entities can be created before the first refresh completes.
+        """
+        snapshot = await self._store.async_load()
+        if snapshot:
+            self._vmail_history = UsageHistory.from_dict(snapshot.get("vmail_history"))
+        data: dict[str, Any] = {
+            key: snapshot[key] for key in SNAPSHOT_KEYS if snapshot and key in snapshot
+        }
+        for key, (source, compute) in self._derived.items():
+            if data.get(source) is not None:
+                data[key] = compute(data[source])
+        self.data = data
+        self.stale_keys = set(self._fetchers)
+        self._saved_signature = self._snapshot_signature()
+        self._serve_restored = bool(data)
+        if data:
+            _LOGGER.debug("Restored Mailcow snapshot for %s", self._base_url)
+        return bool(data)
+
+    def _snapshot_signature(self) -> tuple[Any, ...]:
+        data = self.data or {}
+        return (
+            *(data.get(key) for key in SNAPSHOT_KEYS),
+            len(self._vmail_history),
+            self._vmail_history.last_time,
+        )
+
+    @callback
+    def _async_save_snapshot(self) -> None:
+        """Schedule a snapshot write if its content changed since the last one."""
+        if self._snapshot_pending:
+            # Déjà planifiée : un nouvel appel repousserait l'écriture
+            return
+        if self._snapshot_signature() == self._saved_signature:
+            return
+        self._snapshot_pending = True
+        self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _snapshot(self) -> dict[str, Any]:
+        self._snapshot_pending = False
+        self._saved_signature = self._snapshot_signature()
+        data = self.data or {}
+        snapshot = {key: data[key] for key in SNAPSHOT_KEYS if key in data}
+        snapshot["vmail_history"] = self._vmail_history.as_dict()
+        return snapshot
+
+    async def async_request_refresh_keys(self, keys) -> None:
+        """Make keys due now and request a refresh, e.g. after a service call."""
+        for key in keys:
+            self._next_due.pop(key, None)
+        await self.async_request_refresh()
+
+    def is_stale(self, key: str) -> bool:
+        """Return True if the value of key comes from an earlier, successful refresh."""
+        source = self._derived.get(key, (key, None))[0]
+        return source in self.stale_keys
+
+    @callback
+    def async_apply_push(self, containers: Any = None, mail_queue: list | None = None) -> None:
+        """Apply container states or a mail queue pushed through the webhook right away.
+
+        containers may be partial (only the containers that changed); they are
+        overlaid on the last polled status/containers.
+        """
+        previous = self.data or {}
+        data = dict(previous)
+        pushed: list[str] = []
+        if containers is not None:
+            data["containers_status"] = merge_containers(previous.get("containers_status"), containers)
+            pushed.append("containers_status")
+        if mail_queue is not None:
+            summarizer = MailQueueSummarizer()
+            for item in mail_queue:
+                summarizer.add(item)
+            data["mail_queue"] = summarizer.summary()
+            pushed.append("mail_queue")
+        if not pushed:
+            return
+
+        self._apply_derived(data)
+        now = dt_util.utcnow()
+        for key in pushed:
+            # Valeur fraîche : la prochaine réconciliation est repoussée d'autant
+            self._next_due[key] = now + self._intervals[key]
+        self.stale_keys -= set(pushed)
+        _LOGGER.debug("Applied pushed Mailcow update: %s", ", ".join(pushed))
+        # Pas de async_set_updated_data : il replanifierait le prochain
+        # rafraîchissement, et des pushs fréquents bloqueraient toute interrogation
+        self.data = data
+        self.async_update_listeners()
+        self._async_save_snapshot()
+
+    @callback
+    def _fire_bans_changed(self, previous: Any, current: Any) -> None:
+        """Fire EVENT_BANS_CHANGED with the networks banned and unbanned since the last poll."""
+        if previous is None or current is None:
+            return
+        banned = current.networks - previous.networks
+        unbanned = previous.networks - current.networks
+        if not banned and not unbanned:
+            return
+        self.hass.bus.async_fire(
+            EVENT_BANS_CHANGED,
+            {
+                "base_url": self._base_url,
+                "banned": sorted(banned),
+                "unbanned": sorted(unbanned),
+                "active_bans": len(current.active),
+                "permanent_bans": len(current.permanent),
+            },
+        )
+
+    def _apply_derived(self, data: dict[str, Any]) -> None:
+        for key, (source, compute) in self._derived.items():
+            if data.get(source) is not None:
+                data[key] = compute(data[source])
+            else:
+                data.setdefault(key, None)
+
+    async def _fetch(self, key: str) -> Any:
+        """Run one fetcher under the concurrency cap."""
+        async with self._semaphore:
+            return await self._fetchers[key]()
 
     async def _async_update_data(self) -> dict[str, Any]:
-        if self.disable_check_at_night and await is_night_time(self.hass):
-            _LOGGER.debug("Night check disabled; skipping data update.")
-            return self.data or {}
-        try:
-            version = await self.api.get_status_version()
-            mailbox_count = await self.api.get_mailbox_count()
-            domain_count = await self.api.get_domain_count()
-            vmail_status = await self.api.get_status_vmail()
-            containers_status = await self.api.get_status_containers()
-            latest_version = await self._fetch_latest_github_version()
-
-            return {
-                "version": version,
-                "mailbox_count": mailbox_count,
-                "domain_count": domain_count,
-                "vmail_status": vmail_status,
-                "containers_status": containers_status,
-                "latest_version": latest_version,
-            }
-        except Exception as err:
-            raise UpdateFailed(f"Error fetching data: {err}") from err
+        if not self._time_zone_resolved:
+            # Résolu une seule fois : la résolution peut faire des E/S
+            self._time_zone_resolved = True
+            self._time_zone = (
+                await dt_util.async_get_time_zone(str(self.hass.config.time_zone))
+            ) or dt_util.UTC
+            self.policy.set_time_zone(self._time_zone)
+
+        now = dt_util.utcnow()
+        self._async_schedule_github_check(now)
+        previous = self.data or {}
+        keys = [
+            key
+            for key in self._fetchers
+            if key not in previous
+            or self._next_due.get(key, now) <= now + SCHEDULE_TOLERANCE
+        ]
+        if not keys:
+            return previous
+
+        results = await asyncio.gather(
+            *(self._fetch(key) for key in keys), return_exceptions=True
+        )
+        serve_restored, self._serve_restored = self._serve_restored, False
+
+        # Relu après l'attente : un push ou la vérification GitHub a pu le modifier entre-temps
+        data: dict[str, Any] = dict(self.data or {})
+        errors: dict[str, BaseException] = {}
+        fetched: list[str] = []
+        for key, result in zip(keys, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                errors[key] = result
+                data.setdefault(key, None)
+            else:
+                data[key] = result
+                fetched.append(key)
+
+        if "vmail_status" in fetched:
+            self._record_vmail_sample(data["vmail_status"], now)
+        self._apply_derived(data)
+
+        # Un sous-ensemble en échec ne marque que ses clés comme périmées : les
+        # autres entités, non concernées par ce tick, restent disponibles
+        if errors and len(errors) == len(self._fetchers):
+            error = next(iter(errors.values()))
+            if not serve_restored:
+                raise UpdateFailed(f"Error fetching data: {error}")
+            # Mailcow injoignable au démarrage : l'instantané reste servi un
+            # intervalle, une panne persistante rend ensuite les entités indisponibles
+            _LOGGER.warning("Mailcow unreachable, serving restored values: %s", error)
+
+        if fetched:
+            self.policy.observe(
+                changed=any(data[key] != previous.get(key) for key in fetched),
+                state_changed=bool(previous)
+                and _state_signature(data) != _state_signature(previous),
+            )
+        multiplier = self.policy.multiplier(now)
+        for key in fetched:
+            self._next_due[key] = now + self._intervals[key] * multiplier
+        self.update_interval = self._base_interval * multiplier
+
+        if "fail2ban" in fetched:
+            self._fire_bans_changed(previous.get("fail2ban"), data["fail2ban"])
+
+        if len(errors) < len(self._fetchers):
+            for key, err in errors.items():
+                _LOGGER.warning("Failed to refresh %s, keeping last value: %s", key, err)
+        self.stale_keys = (self.stale_keys - set(keys)) | set(errors)
+        self._async_save_snapshot()
+        return data
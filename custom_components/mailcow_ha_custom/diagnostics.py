@@ -0,0 +1,34 @@
+"""Diagnostics support for the Mailcow integration."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_API_KEY, CONF_WEBHOOK_ID, DOMAIN
+
+TO_REDACT = {CONF_API_KEY, CONF_WEBHOOK_ID}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "stale_keys": sorted(coordinator.stale_keys),
+            "shared_with_entries": sorted(coordinator.entry_ids),
+        },
+        "api": {
+            "requests": dict(api.stats),
+            "circuit_breaker": api.breaker.as_dict(),
+            "endpoints": {
+                name: metrics.summary()
+                for name, metrics in sorted(coordinator.endpoint_metrics().items())
+            },
+        },
+    }
@@ -0,0 +1,239 @@
+"""Shared entity helpers for the Mailcow integration."""
+import logging
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity import Entity, EntityDescription
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def sanitize_url(url: str) -> str:
+    return ''.join(filter(str.isalnum, url))
+
+
+def entry_device_info(coordinator: DataUpdateCoordinator, entry_id: str) -> DeviceInfo:
+    """Return the device of a config entry, built once and shared by its entities.
+
+    sw_version is left out: it is kept up to date in the device registry by
+    async_track_device_version.
+    """
+    device_info = coordinator.device_infos.get(entry_id)
+    if device_info is None:
+        base_url = coordinator._base_url
+        device_info = coordinator.device_infos[entry_id] = DeviceInfo(
+            identifiers={(DOMAIN, entry_id)},
+            manufacturer="Master13011",
+            model="API",
+            name=urlparse(base_url).netloc,
+            configuration_url=base_url,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+    return device_info
+
+
+@callback
+def async_track_device_version(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: DataUpdateCoordinator
+) -> None:
+    """Copy the Mailcow version to the entry's device whenever it changes."""
+
+    @callback
+    def _async_update_version() -> None:
+        version = (coordinator.data or {}).get("version")
+        if not version:
+            return
+        registry = dr.async_get(hass)
+        device = registry.async_get_device(identifiers={(DOMAIN, entry.entry_id)})
+        if device is not None and device.sw_version != version:
+            registry.async_update_device(device.id, sw_version=version)
+
+    _async_update_version()
+    entry.async_on_unload(coordinator.async_add_listener(_async_update_version))
+
+
+class MailcowCoordinatorEntity(CoordinatorEntity):
+    """Coordinator entity that only writes its state when something changed."""
+
+    _last_written: tuple[Any, ...] | None = None
+
+    def _update_values(self) -> None:
+        """Refresh values cached from the coordinator data, once per update."""
+
+    def _state_fingerprint(self) -> tuple[Any, ...]:
+        return (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._update_values()
+        fingerprint = self._state_fingerprint()
+        if fingerprint == self._last_written:
+            return
+        self._last_written = fingerprint
+        self.async_write_ha_state()
+
+
+@dataclass(frozen=True, kw_only=True)
+class MailcowEntityDescription(EntityDescription):
+    """Where a Mailcow entity reads its value and attributes.
+
+    Without items_fn, value_fn and attributes_fn get the coordinator data.
+    With it, one entity is created per item it returns and they get that
+    item's record; name may then contain "{item}".
+    """
+
+    value_fn: Callable[[Any], Any]
+    attributes_fn: Callable[[Any], dict[str, Any] | None] | None = None
+    # Clé de données dont la fraîcheur est exposée dans l'attribut "stale"
+    stale_key: str | None = None
+    items_fn: Callable[[DataUpdateCoordinator], Mapping[str, Any] | None] | None = None
+    # Identifiant d'élément nettoyé comme une URL dans l'unique_id
+    sanitize_item: bool = False
+
+
+class MailcowEntity(MailcowCoordinatorEntity):
+    """Entity driven by a MailcowEntityDescription.
+
+    Value and attributes are extracted once per coordinator update and
+    cached, so state reads do no parsing.
+    """
+
+    entity_description: MailcowEntityDescription
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        entry_id: str,
+        description: MailcowEntityDescription,
+        item: str | None = None,
+    ) -> None:
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._item = item
+        self._entry_id = entry_id
+        base = sanitize_url(coordinator._base_url)
+        if item is None:
+            self._attr_name = description.name
+            self._attr_unique_id = f"mailcow_{description.key}_{base}_{entry_id}"
+        else:
+            item_id = sanitize_url(item) if description.sanitize_item else item
+            self._attr_name = description.name.format(item=item)
+            self._attr_unique_id = f"mailcow_{description.key}_{item_id}_{base}_{entry_id}"
+        self._attr_device_info = entry_device_info(coordinator, entry_id)
+        self._present = True
+        self._value: Any = None
+        self._attributes: dict[str, Any] | None = None
+        self._update_values()
+
+    def _update_values(self) -> None:
+        description = self.entity_description
+        source: Any = self.coordinator.data or {}
+        if description.items_fn is not None:
+            source = (description.items_fn(self.coordinator) or {}).get(self._item)
+            self._present = source is not None
+            if source is None:
+                self._value = self._attributes = None
+                return
+        self._value = description.value_fn(source)
+        attributes = description.attributes_fn(source) if description.attributes_fn else None
+        if description.stale_key is not None:
+            attributes = {
+                **(attributes or {}),
+                "stale": self.coordinator.is_stale(description.stale_key),
+            }
+        self._attributes = attributes
+
+    @property
+    def available(self) -> bool:
+        return super().available and self._present
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return self._attributes
+
+
+@callback
+def async_track_description_entities(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: DataUpdateCoordinator,
+    descriptions: tuple[MailcowEntityDescription, ...],
+    entity_cls: type[MailcowEntity],
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Create one entity per description for every item of their shared items_fn."""
+    items_fn = descriptions[0].items_fn
+    async_track_dynamic_entities(
+        hass,
+        entry,
+        coordinator,
+        lambda data: items_fn(coordinator),
+        lambda item: [
+            entity_cls(coordinator, entry.entry_id, description, item)
+            for description in descriptions
+        ],
+        async_add_entities,
+    )
+
+
+@callback
+def async_track_dynamic_entities(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: DataUpdateCoordinator,
+    get_ids: Callable[[dict[str, Any]], Iterable[str] | None],
+    create_entities: Callable[[str], list[Entity]],
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Keep one group of entities per id in sync with the coordinator data.
+
+    Only the ids that appeared or disappeared since the previous update are
+    touched; entities of removed ids are dropped from the entity registry.
+    When get_ids returns None (data unavailable), nothing is removed.
+    """
+    entities: dict[str, list[Entity]] = {}
+
+    @callback
+    def _async_sync() -> None:
+        ids = get_ids(coordinator.data or {})
+        if ids is None:
+            return
+        current = set(ids)
+        known = entities.keys()
+
+        added = current - known
+        if added:
+            new_entities: list[Entity] = []
+            for item_id in added:
+                entities[item_id] = create_entities(item_id)
+                new_entities.extend(entities[item_id])
+            async_add_entities(new_entities)
+
+        removed = known - current
+        if removed:
+            registry = er.async_get(hass)
+            for item_id in removed:
+                for entity in entities.pop(item_id):
+                    if entity.entity_id and registry.async_get(entity.entity_id):
+                        registry.async_remove(entity.entity_id)
+                    elif entity.hass is not None:
+                        hass.async_create_task(entity.async_remove())
+            _LOGGER.debug("Removed entities for %d vanished ids", len(removed))
+
+    _async_sync()
+    entry.async_on_unload(coordinator.async_add_listener(_async_sync))
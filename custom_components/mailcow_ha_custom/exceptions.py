@@ -16,3 +16,11 @@ class MailcowAuthenticationError(MailcowAPIError):
 
 class MailcowConnectionError(MailcowAPIError):
     """Erreur de connexion à l'API Mailcow (réseau, timeout, etc.)."""
+
+
+class MailcowServerError(MailcowAPIError):
+    """Erreur 5xx renvoyée par le serveur Mailcow."""
+
+
+class MailcowCircuitOpenError(MailcowConnectionError):
+    """Appel refusé : le disjoncteur de l'hôte Mailcow est ouvert."""
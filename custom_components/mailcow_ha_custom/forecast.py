@@ -0,0 +1,148 @@
+"""Vmail usage history and fill forecast, updated in constant time per sample."""
+from array import array
+from dataclasses import dataclass
+import re
+from typing import Any
+
+# 14 jours à raison d'un échantillon toutes les 30 minutes
+HISTORY_SIZE = 672
+SAMPLE_INTERVAL = 1800  # secondes
+# En dessous, la pente n'est que du bruit d'arrondi de df -h
+MIN_SAMPLES = 12
+MIN_SPAN = 6 * 3600  # secondes
+
+SECONDS_PER_DAY = 86400
+
+# Tailles "df -h" renvoyées par status/vmail : "512M", "1.2T", "42G"
+_SIZE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*([KMGTPE]?)i?B?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40, "P": 2**50, "E": 2**60}
+
+
+def parse_size(value: Any) -> int | None:
+    """Convert a human readable size from status/vmail to bytes."""
+    if not isinstance(value, str):
+        return None
+    match = _SIZE.match(value)
+    if match is None:
+        return None
+    number, unit = match.groups()
+    return int(float(number.replace(",", ".")) * _UNITS[unit.upper()])
+
+
+@dataclass(slots=True, frozen=True)
+class VmailForecast:
+    """Growth of the vmail volume and when it will be full at that pace."""
+
+    growth_per_day: float | None
+    days_until_full: float | None
+
+
+class UsageHistory:
+    """Fixed-size ring buffer of (timestamp, used bytes) with a rolling linear fit.
+
+    The sums of the least-squares fit are adjusted as samples enter and
+    leave the window, so adding a sample and forecasting are O(1). They
+    are recomputed exactly each time the buffer wraps, which bounds the
+    rounding drift of the incremental updates and re-centres timestamps.
+    """
+
+    def __init__(self, size: int = HISTORY_SIZE) -> None:
+        self._size = size
+        self._times = array("d")
+        self._used = array("d")
+        self._start = 0  # index du plus ancien échantillon une fois plein
+        self._origin = 0.0
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        self._since_resum = 0
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def last_time(self) -> float | None:
+        if not self._times:
+            return None
+        return self._times[self._start - 1]
+
+    def add(self, timestamp: float, used: float) -> bool:
+        """Record a sample unless the previous one is less than SAMPLE_INTERVAL old."""
+        last = self.last_time
+        if last is None:
+            self._origin = timestamp
+        elif timestamp - last < SAMPLE_INTERVAL:
+            return False
+        if len(self._times) < self._size:
+            self._times.append(timestamp)
+            self._used.append(used)
+        else:
+            self._account(self._times[self._start], self._used[self._start], -1)
+            self._times[self._start] = timestamp
+            self._used[self._start] = used
+            self._start = (self._start + 1) % self._size
+        self._account(timestamp, used, 1)
+        self._since_resum += 1
+        if self._since_resum >= self._size:
+            self._resum()
+        return True
+
+    def _account(self, timestamp: float, used: float, sign: int) -> None:
+        x = (timestamp - self._origin) / SECONDS_PER_DAY
+        self._n += sign
+        self._sx += sign * x
+        self._sy += sign * used
+        self._sxx += sign * x * x
+        self._sxy += sign * x * used
+
+    def _ordered(self) -> list[tuple[float, float]]:
+        order = list(range(self._start, len(self._times))) + list(range(self._start))
+        return [(self._times[i], self._used[i]) for i in order]
+
+    def _resum(self) -> None:
+        samples = self._ordered()
+        self._origin = samples[0][0] if samples else 0.0
+        self._n = 0
+        self._sx = self._sy = self._sxx = self._sxy = 0.0
+        for timestamp, used in samples:
+            self._account(timestamp, used, 1)
+        self._since_resum = 0
+
+    def growth_per_day(self) -> float | None:
+        """Slope of the least-squares fit in bytes per day, None until the window is long enough."""
+        if self._n < MIN_SAMPLES or self._ordered_span() < MIN_SPAN:
+            return None
+        denominator = self._n * self._sxx - self._sx * self._sx
+        if denominator <= 0:
+            return None
+        return (self._n * self._sxy - self._sx * self._sy) / denominator
+
+    def _ordered_span(self) -> float:
+        return self._times[self._start - 1] - self._times[self._start]
+
+    def forecast(self, total: int | None) -> VmailForecast:
+        growth = self.growth_per_day()
+        days = None
+        if growth is not None and growth > 0 and total:
+            remaining = max(0.0, total - self._used[self._start - 1])
+            days = round(remaining / growth, 1)
+        return VmailForecast(growth_per_day=growth, days_until_full=days)
+
+    def as_dict(self) -> dict[str, list[float]]:
+        """Samples oldest first, for the snapshot store."""
+        samples = self._ordered()
+        return {
+            "times": [timestamp for timestamp, _ in samples],
+            "used": [used for _, used in samples],
+        }
+
+    @classmethod
+    def from_dict(cls, stored: Any, size: int = HISTORY_SIZE) -> "UsageHistory":
+        history = cls(size)
+        if isinstance(stored, dict):
+            samples = list(zip(stored.get("times") or [], stored.get("used") or []))
+            # Ajout direct : l'espacement a déjà été respecté à l'enregistrement
+            for timestamp, used in samples[-size:]:
+                history._times.append(float(timestamp))
+                history._used.append(float(used))
+            history._resum()
+        return history
@@ -0,0 +1,167 @@
+"""Shared cache for the latest Mailcow release tag published on GitHub."""
+import asyncio
+import logging
+import time
+from typing import Any
+
+from aiohttp import ClientTimeout
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.singleton import singleton
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import json_loads
+
+from .const import DOMAIN
+from .metrics import MetricsRegistry, RequestSample
+
+_LOGGER = logging.getLogger(__name__)
+
+GITHUB_TAGS_URL = "https://api.github.com/repos/mailcow/mailcow-dockerized/tags"
+METRICS_ENDPOINT = "github/tags"
+
+STORAGE_KEY = f"{DOMAIN}.github_tags"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+CACHE_TTL = 3600  # secondes
+# En dessous de ce quota restant, on attend la réinitialisation annoncée par GitHub
+RATE_LIMIT_MIN_REMAINING = 5
+RATE_LIMIT_FALLBACK_BACKOFF = 3600
+
+
+@singleton(f"{DOMAIN}_github_cache")
+@callback
+def async_get_github_cache(hass: HomeAssistant) -> "GitHubVersionCache":
+    """Return the cache shared by every Mailcow config entry."""
+    return GitHubVersionCache(hass)
+
+
+class GitHubVersionCache:
+    """TTL-bounded, persisted cache of the latest mailcow-dockerized tag.
+
+    Requests are conditional (ETag / Last-Modified), so an unchanged tag list
+    costs a 304, and no request is sent while GitHub reports an exhausted
+    rate limit.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._version: str | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._fetched_at = 0.0
+        self._blocked_until = 0.0
+        # Seules les vraies requêtes sont mesurées, pas les réponses servies du cache
+        self.metrics = MetricsRegistry()
+
+    async def async_get_latest_version(self) -> str:
+        """Return the latest tag name, fetching it only when the cache expired."""
+        async with self._lock:
+            if not self._loaded:
+                await self._async_load()
+
+            now = time.time()
+            if self._version and now - self._fetched_at < CACHE_TTL:
+                return self._version
+            if now < self._blocked_until:
+                _LOGGER.debug(
+                    "GitHub rate limit low, next tags lookup in %.0fs",
+                    self._blocked_until - now,
+                )
+                return self._version or "unknown"
+
+            await self._async_fetch(now)
+            return self._version or "unknown"
+
+    async def _async_load(self) -> None:
+        self._loaded = True
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        self._version = stored.get("version")
+        self._etag = stored.get("etag")
+        self._last_modified = stored.get("last_modified")
+        self._fetched_at = stored.get("fetched_at", 0.0)
+        self._blocked_until = stored.get("blocked_until", 0.0)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "version": self._version,
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+            "fetched_at": self._fetched_at,
+            "blocked_until": self._blocked_until,
+        }
+
+    async def _async_fetch(self, now: float) -> None:
+        headers = {"Accept": "application/vnd.github+json"}
+        if self._version:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+
+        session = async_get_clientsession(self._hass)
+        sample = RequestSample()
+        started = time.monotonic()
+        error: Exception | None = None
+        try:
+            async with session.get(
+                GITHUB_TAGS_URL, headers=headers, timeout=ClientTimeout(total=10)
+            ) as response:
+                sample.status = response.status
+                self._update_rate_limit(response.status, response.headers, now)
+
+                if response.status == 304:
+                    self._fetched_at = now
+                elif response.status == 200:
+                    body = await response.read()
+                    sample.size = len(body)
+                    parse_started = time.perf_counter()
+                    tags = json_loads(body)
+                    sample.parse_time = time.perf_counter() - parse_started
+                    names = [tag["name"] for tag in tags if tag.get("name")]
+                    if names:
+                        self._version = max(names)
+                    self._etag = response.headers.get("ETag")
+                    self._last_modified = response.headers.get("Last-Modified")
+                    self._fetched_at = now
+                else:
+                    _LOGGER.warning(
+                        "GitHub tags lookup returned HTTP %s", response.status
+                    )
+        except Exception as e:
+            error = e
+            _LOGGER.error(f"Error fetching GitHub version: {e}")
+        self.metrics.record(METRICS_ENDPOINT, time.monotonic() - started, sample, error)
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _update_rate_limit(self, status: int, headers, now: float) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        try:
+            remaining_int = int(remaining) if remaining is not None else None
+            reset_at = float(reset) if reset is not None else None
+        except ValueError:
+            remaining_int = reset_at = None
+
+        exhausted = status in (403, 429) and (remaining_int in (None, 0))
+        if exhausted or (
+            remaining_int is not None and remaining_int <= RATE_LIMIT_MIN_REMAINING
+        ):
+            retry_after = headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                self._blocked_until = now + int(retry_after)
+            elif reset_at:
+                self._blocked_until = reset_at
+            else:
+                self._blocked_until = now + RATE_LIMIT_FALLBACK_BACKOFF
+            _LOGGER.info(
+                "GitHub rate limit nearly exhausted (remaining=%s), pausing tags lookups",
+                remaining,
+            )
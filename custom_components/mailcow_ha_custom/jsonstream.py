@@ -0,0 +1,99 @@
+"""Incremental helpers for large Mailcow JSON payloads."""
+import codecs
+import json
+import re
+from typing import Any, Callable, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Un nombre complet peut encore être prolongé par ".5", "e5" ou "e+5"
+_NUMBER_START = frozenset("-0123456789")
+_NUMBER_TAIL = 2
+
+
+class JsonArrayCounter:
+    """Count the top-level elements of a JSON array fed chunk by chunk.
+
+    Only the element being decoded and the unread tail of the current chunk
+    are held in memory, so the full payload is never materialised. If
+    on_item is given, each decoded element is passed to it before being
+    discarded.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[Any], None]] = None) -> None:
+        self._on_item = on_item
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._done = False
+        # Position dans le tableau : "first" après "[", "value" après ",", "separator" après un élément
+        self._expect = "first"
+        self.is_array: Optional[bool] = None
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> None:
+        self._buffer += self._utf8.decode(chunk)
+        self._consume(final=False)
+
+    def close(self) -> Optional[int]:
+        """Finish parsing and return the element count, or None if not an array."""
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._consume(final=True)
+        if self.is_array and not self._done:
+            raise ValueError("Truncated JSON array")
+        return self.count if self.is_array else None
+
+    def _consume(self, final: bool) -> None:
+        buf = self._buffer
+        end = len(buf)
+        pos = _WHITESPACE.match(buf, 0).end()
+
+        if self.is_array is None:
+            if pos == end:
+                self._buffer = ""
+                return
+            self.is_array = buf[pos] == "["
+            pos += 1
+
+        if not self.is_array or self._done:
+            self._buffer = ""
+            return
+
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == end:
+                break
+            char = buf[pos]
+            if char == "]":
+                if self._expect == "value":
+                    raise json.JSONDecodeError("Expecting value", buf, pos)
+                self._done = True
+                pos = end
+                break
+            if char == ",":
+                if self._expect != "separator":
+                    raise json.JSONDecodeError("Expecting value", buf, pos)
+                self._expect = "value"
+                pos += 1
+                continue
+            if self._expect == "separator":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            try:
+                item, next_pos = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # Element coupé entre deux chunks : on attend la suite
+                break
+            if not final and (
+                next_pos == end
+                or (char in _NUMBER_START and end - next_pos <= _NUMBER_TAIL)
+            ):
+                # Un scalaire en fin de buffer peut encore continuer
+                break
+            self._expect = "separator"
+            self.count += 1
+            pos = next_pos
+            if self._on_item is not None:
+                self._on_item(item)
+
+        self._buffer = buf[pos:]
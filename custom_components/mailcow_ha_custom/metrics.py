@@ -0,0 +1,107 @@
+"""Rolling per-endpoint request metrics for the Mailcow integration."""
+from collections import deque
+import math
+from typing import Any
+
+# Nombre de requêtes conservées par endpoint pour les percentiles
+METRICS_WINDOW = 100
+
+
+class RequestSample:
+    """What one HTTP exchange reported: status, body size and JSON parse time."""
+
+    __slots__ = ("status", "size", "parse_time")
+
+    def __init__(self) -> None:
+        self.status: int | None = None
+        self.size = 0
+        self.parse_time = 0.0
+
+
+class RollingHistogram:
+    """Last METRICS_WINDOW values, summarized as p50/p95/max on demand."""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, window: int = METRICS_WINDOW) -> None:
+        self._values: deque[float] = deque(maxlen=window)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def summary(self) -> dict[str, float | None]:
+        values = sorted(self._values)
+        if not values:
+            return {"p50": None, "p95": None, "max": None}
+        return {
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class EndpointMetrics:
+    """Latency, size, parse time and outcome counters of one endpoint."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.latency_ms = RollingHistogram()
+        self.size_bytes = RollingHistogram()
+        self.parse_ms = RollingHistogram()
+        self.statuses: dict[int, int] = {}
+        self.errors: dict[str, int] = {}
+        self._summary: dict[str, Any] | None = None
+
+    def record(
+        self, elapsed: float, sample: RequestSample, error: BaseException | None = None
+    ) -> None:
+        self.requests += 1
+        self.latency_ms.add(round(elapsed * 1000, 1))
+        if sample.status is not None:
+            self.statuses[sample.status] = self.statuses.get(sample.status, 0) + 1
+            self.size_bytes.add(sample.size)
+            self.parse_ms.add(round(sample.parse_time * 1000, 2))
+        if error is not None:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+        self._summary = None
+
+    def summary(self) -> dict[str, Any]:
+        """Return the histograms and counters, recomputed only after a new request."""
+        if self._summary is None:
+            self._summary = {
+                "requests": self.requests,
+                "latency_ms": self.latency_ms.summary(),
+                "size_bytes": self.size_bytes.summary(),
+                "parse_ms": self.parse_ms.summary(),
+                "statuses": dict(self.statuses),
+                "errors": dict(self.errors),
+            }
+        return self._summary
+
+
+class MetricsRegistry:
+    """EndpointMetrics by endpoint, created on first use."""
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        elapsed: float,
+        sample: RequestSample,
+        error: BaseException | None = None,
+    ) -> None:
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.record(elapsed, sample, error)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: metrics.summary() for name, metrics in sorted(self.endpoints.items())}
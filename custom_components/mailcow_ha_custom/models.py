@@ -0,0 +1,381 @@
+"""Compact records built from bulk Mailcow API responses."""
+from bisect import bisect_right
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Iterator
+
+# Docker renvoie des fractions de seconde en nanosecondes, non gérées par fromisoformat
+_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+
+def _as_int(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_datetime(value: Any, default_tz: tzinfo = timezone.utc) -> datetime | None:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(_FRACTION.sub(r"\1", value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=default_tz)
+
+
+@dataclass(slots=True, frozen=True)
+class MailboxRecord:
+    """Quota and usage of one mailbox from mailbox/all."""
+
+    quota: int
+    quota_used: int
+    percent_in_use: float | None
+    messages: int
+
+    @classmethod
+    def from_api(cls, item: dict[str, Any]) -> "MailboxRecord":
+        return cls(
+            quota=_as_int(item.get("quota")),
+            quota_used=_as_int(item.get("quota_used")),
+            # Mailcow renvoie "- " pour les boîtes sans quota
+            percent_in_use=_as_float(item.get("percent_in_use")),
+            messages=_as_int(item.get("messages")),
+        )
+
+
+def _as_list(payload: Any) -> list[Any] | None:
+    """Return a collection payload as a list, or None when its shape is unexpected.
+
+    Mailcow renders an empty collection as {}; any other non-list (an error
+    object returned with a 200) is not an empty collection.
+    """
+    if isinstance(payload, list):
+        return payload
+    if payload == {}:
+        return []
+    return None
+
+
+def index_mailboxes(payload: Any) -> dict[str, MailboxRecord] | None:
+    """Index mailbox/all by username, None when the payload is not a list."""
+    payload = _as_list(payload)
+    if payload is None:
+        return None
+    return {
+        item["username"]: MailboxRecord.from_api(item)
+        for item in payload
+        if isinstance(item, dict) and item.get("username")
+    }
+
+
+@dataclass(slots=True, frozen=True)
+class ContainerRecord:
+    """State of one Mailcow container from status/containers."""
+
+    state: str | None
+    started_at: datetime | None
+    image: str | None
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    @classmethod
+    def from_api(cls, item: dict[str, Any]) -> "ContainerRecord":
+        return cls(
+            state=item.get("state"),
+            started_at=_as_datetime(item.get("started_at")),
+            image=item.get("image"),
+        )
+
+
+def _container_items(payload: Any) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield (name, item) from status/containers, for both the list and dict shapes."""
+    if isinstance(payload, dict):
+        items = payload.items()
+    elif isinstance(payload, list):
+        items = ((None, item) for item in payload)
+    else:
+        return
+    for name, item in items:
+        if isinstance(item, dict) and (item.get("container") or name):
+            yield item.get("container") or name, item
+
+
+def index_containers(payload: Any) -> dict[str, ContainerRecord]:
+    """Index status/containers by container name."""
+    return {name: ContainerRecord.from_api(item) for name, item in _container_items(payload)}
+
+
+def merge_containers(current: Any, update: Any) -> dict[str, dict[str, Any]]:
+    """Overlay a partial status/containers payload on the last full one, by name."""
+    merged = dict(_container_items(current))
+    for name, item in _container_items(update):
+        merged[name] = {**merged.get(name, {}), **item}
+    return merged
+
+
+def _percent(used: int, total: int) -> float | None:
+    return round(used / total * 100, 1) if total > 0 else None
+
+
+@dataclass(slots=True, frozen=True)
+class DomainRecord:
+    """Usage of one domain from domain/all."""
+
+    mailboxes: int
+    bytes_used: int
+    quota: int
+    messages: int
+
+    @property
+    def percent_in_use(self) -> float | None:
+        return _percent(self.bytes_used, self.quota)
+
+
+@dataclass(slots=True, frozen=True)
+class DomainSummary:
+    """domain/all indexed by domain name, with the instance-wide totals."""
+
+    domains: dict[str, DomainRecord]
+    mailboxes: int
+    bytes_used: int
+    quota: int
+    messages: int
+
+    def __len__(self) -> int:
+        return len(self.domains)
+
+    @property
+    def percent_in_use(self) -> float | None:
+        return _percent(self.bytes_used, self.quota)
+
+
+def summarize_domains(payload: Any) -> DomainSummary | None:
+    """Build the per-domain records and the totals in a single pass over domain/all.
+
+    None when the payload is not a list.
+    """
+    payload = _as_list(payload)
+    if payload is None:
+        return None
+    domains: dict[str, DomainRecord] = {}
+    mailboxes = bytes_used = quota = messages = 0
+    for item in payload:
+        if not isinstance(item, dict) or not item.get("domain_name"):
+            continue
+        record = DomainRecord(
+            mailboxes=_as_int(item.get("mboxes_in_domain")),
+            bytes_used=_as_int(item.get("bytes_total")),
+            quota=_as_int(item.get("max_quota_for_domain")),
+            messages=_as_int(item.get("msgs_total")),
+        )
+        domains[item["domain_name"]] = record
+        mailboxes += record.mailboxes
+        bytes_used += record.bytes_used
+        quota += record.quota
+        messages += record.messages
+    return DomainSummary(domains, mailboxes, bytes_used, quota, messages)
+
+
+@dataclass(slots=True, frozen=True)
+class MailQueueSummary:
+    """Counts of the postfix queue from mailq/all."""
+
+    total: int
+    by_queue: dict[str, int]
+    oldest_arrival: datetime | None
+
+    @property
+    def deferred(self) -> int:
+        return self.by_queue.get("deferred", 0)
+
+
+class MailQueueSummarizer:
+    """Accumulate mailq/all entries one at a time without keeping them."""
+
+    __slots__ = ("_total", "_by_queue", "_oldest")
+
+    def __init__(self) -> None:
+        self._total = 0
+        self._by_queue: dict[str, int] = {}
+        self._oldest: float | None = None
+
+    def add(self, item: Any) -> None:
+        if not isinstance(item, dict):
+            return
+        self._total += 1
+        queue = item.get("queue_name") or "unknown"
+        self._by_queue[queue] = self._by_queue.get(queue, 0) + 1
+        arrival = _as_float(item.get("arrival_time"))
+        if arrival is not None and (self._oldest is None or arrival < self._oldest):
+            self._oldest = arrival
+
+    def summary(self) -> MailQueueSummary:
+        oldest = None
+        if self._oldest is not None:
+            oldest = datetime.fromtimestamp(self._oldest, tz=timezone.utc)
+        return MailQueueSummary(self._total, dict(self._by_queue), oldest)
+
+
+# Bornes des tranches de score rspamd des messages en quarantaine
+QUARANTINE_SCORE_BUCKETS = (5, 10, 15, 20)
+
+
+def _score_bucket(score: float | None) -> str:
+    if score is None:
+        return "unknown"
+    index = bisect_right(QUARANTINE_SCORE_BUCKETS, score)
+    if index == len(QUARANTINE_SCORE_BUCKETS):
+        return f"{QUARANTINE_SCORE_BUCKETS[-1]}+"
+    low = QUARANTINE_SCORE_BUCKETS[index - 1] if index else 0
+    return f"{low}-{QUARANTINE_SCORE_BUCKETS[index]}"
+
+
+@dataclass(slots=True, frozen=True)
+class QuarantineSummary:
+    """Counts of quarantine/all by rspamd action and score bucket."""
+
+    total: int
+    by_action: dict[str, int]
+    by_score: dict[str, int]
+
+
+class QuarantineSummarizer:
+    """Accumulate quarantine/all entries one at a time without keeping them."""
+
+    __slots__ = ("_total", "_by_action", "_by_score")
+
+    def __init__(self) -> None:
+        self._total = 0
+        self._by_action: dict[str, int] = {}
+        self._by_score: dict[str, int] = {}
+
+    def add(self, item: Any) -> None:
+        if not isinstance(item, dict):
+            return
+        self._total += 1
+        action = item.get("action") or "unknown"
+        self._by_action[action] = self._by_action.get(action, 0) + 1
+        bucket = _score_bucket(_as_float(item.get("score")))
+        self._by_score[bucket] = self._by_score.get(bucket, 0) + 1
+
+    def summary(self) -> QuarantineSummary:
+        return QuarantineSummary(self._total, dict(self._by_action), dict(self._by_score))
+
+
+@dataclass(slots=True, frozen=True)
+class Fail2banSummary:
+    """Networks currently banned by Mailcow's netfilter container."""
+
+    active: frozenset[str]
+    permanent: frozenset[str]
+
+    @property
+    def networks(self) -> frozenset[str]:
+        return self.active | self.permanent
+
+
+def _ban_networks(items: Any) -> frozenset[str]:
+    if not isinstance(items, list):
+        return frozenset()
+    return frozenset(
+        item["network"] for item in items if isinstance(item, dict) and item.get("network")
+    )
+
+
+def summarize_fail2ban(payload: Any) -> Fail2banSummary:
+    """Keep only the banned networks of the fail2ban response."""
+    if not isinstance(payload, dict):
+        return Fail2banSummary(frozenset(), frozenset())
+    return Fail2banSummary(
+        active=_ban_networks(payload.get("active_bans")),
+        permanent=_ban_networks(payload.get("perm_bans")),
+    )
+
+
+@dataclass(slots=True, frozen=True)
+class SyncJobRecord:
+    """State of one imapsync job from syncjobs/all."""
+
+    user: str
+    host: str
+    active: bool
+    running: bool
+    last_run: datetime | None
+    success: bool | None
+    exit_status: str | None
+    # Minutes de retard sur l'intervalle prévu, 0 si à l'heure, None si jamais lancé
+    lag: int | None
+
+    @property
+    def failing(self) -> bool:
+        return self.active and self.success is False
+
+
+@dataclass(slots=True, frozen=True)
+class SyncJobSummary:
+    """syncjobs/all indexed by job id, with the failing count and oldest successful run."""
+
+    jobs: dict[str, SyncJobRecord]
+    failing: int
+    # Plus ancien dernier passage réussi parmi les tâches actives
+    oldest_success: datetime | None
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+
+def _sync_job_lag(last_run: datetime | None, interval: int, now: datetime) -> int | None:
+    if last_run is None:
+        return None
+    overdue = now - last_run - timedelta(minutes=interval)
+    return max(0, int(overdue.total_seconds() // 60))
+
+
+def summarize_syncjobs(
+    payload: Any, now: datetime, time_zone: tzinfo
+) -> SyncJobSummary | None:
+    """Build the per-job records and the aggregates in a single pass over syncjobs/all.
+
+    Mailcow stores last_run in the server's local time without an offset;
+    time_zone is assumed for it. None when the payload is not a list.
+    """
+    payload = _as_list(payload)
+    if payload is None:
+        return None
+    jobs: dict[str, SyncJobRecord] = {}
+    failing = 0
+    oldest_success: datetime | None = None
+    for item in payload:
+        if not isinstance(item, dict) or item.get("id") is None:
+            continue
+        last_run = _as_datetime(item.get("last_run"), time_zone)
+        success = item.get("success")
+        record = SyncJobRecord(
+            user=item.get("user2") or "",
+            host=item.get("host1") or "",
+            active=bool(_as_int(item.get("active"))),
+            running=bool(_as_int(item.get("is_running"))),
+            last_run=last_run,
+            success=None if success is None else bool(_as_int(success)),
+            exit_status=item.get("exit_status") or None,
+            lag=_sync_job_lag(last_run, _as_int(item.get("mins_interval")), now),
+        )
+        jobs[str(item["id"])] = record
+        if record.failing:
+            failing += 1
+        elif record.active and record.success and last_run is not None:
+            if oldest_success is None or last_run < oldest_success:
+                oldest_success = last_run
+    return SyncJobSummary(jobs, failing, oldest_success)
@@ -1,18 +1,56 @@
 import voluptuous as vol
 from typing import Any
 
+from homeassistant.components import webhook
 from homeassistant.config_entries import OptionsFlowWithReload, ConfigFlowResult
+from homeassistant.helpers.network import NoURLAvailableError
 
 from .const import (
     CONF_API_KEY,
     CONF_DISABLE_CHECK_AT_NIGHT,
     CONF_SCAN_INTERVAL,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_CONTAINERS_SCAN_INTERVAL,
+    CONF_VERSION_SCAN_INTERVAL,
+    CONF_MAILBOX_SENSORS,
+    CONF_DEDICATED_SESSION,
+    CONF_LOG_SENSORS,
+    CONF_DOMAIN_SENSORS,
+    CONF_SECURITY_SENSORS,
+    CONF_SYNCJOB_SENSORS,
+    CONF_WEBHOOK,
+    CONF_WEBHOOK_ID,
+    CONF_QUIET_WINDOWS,
+    CONF_ADAPTIVE_POLLING,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_CONTAINERS_SCAN_INTERVAL,
+    DEFAULT_VERSION_SCAN_INTERVAL,
 )
+from .polling import quiet_windows_validator
 
 OPTIONS_SCHEMA = vol.Schema({
     vol.Required(CONF_API_KEY): str,
     vol.Optional(CONF_DISABLE_CHECK_AT_NIGHT, default=False): bool,
-    vol.Optional(CONF_SCAN_INTERVAL, default=10): vol.All(int, vol.Range(min=1)),
+    vol.Optional(CONF_QUIET_WINDOWS, default=""): vol.All(str, quiet_windows_validator),
+    vol.Optional(CONF_ADAPTIVE_POLLING, default=True): bool,
+    vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): vol.All(int, vol.Range(min=1)),
+    vol.Optional(
+        CONF_CONTAINERS_SCAN_INTERVAL, default=DEFAULT_CONTAINERS_SCAN_INTERVAL
+    ): vol.All(int, vol.Range(min=10)),
+    vol.Optional(
+        CONF_VERSION_SCAN_INTERVAL, default=DEFAULT_VERSION_SCAN_INTERVAL
+    ): vol.All(int, vol.Range(min=1)),
+    vol.Optional(
+        CONF_MAX_CONCURRENT_REQUESTS, default=DEFAULT_MAX_CONCURRENT_REQUESTS
+    ): vol.All(int, vol.Range(min=1, max=10)),
+    vol.Optional(CONF_MAILBOX_SENSORS, default=False): bool,
+    vol.Optional(CONF_DEDICATED_SESSION, default=False): bool,
+    vol.Optional(CONF_LOG_SENSORS, default=False): bool,
+    vol.Optional(CONF_DOMAIN_SENSORS, default=False): bool,
+    vol.Optional(CONF_SECURITY_SENSORS, default=False): bool,
+    vol.Optional(CONF_SYNCJOB_SENSORS, default=False): bool,
+    vol.Optional(CONF_WEBHOOK, default=False): bool,
 })
 
 
@@ -32,4 +70,14 @@ class MailcowOptionsFlowHandler(OptionsFlowWithReload):
         return self.async_show_form(
             step_id="init",
             data_schema=data_schema,
-        )
\ No newline at end of file
+            description_placeholders={"webhook_url": self._webhook_url()},
+        )
+
+    def _webhook_url(self) -> str:
+        webhook_id = self.config_entry.data.get(CONF_WEBHOOK_ID)
+        if webhook_id is None:
+            return "-"
+        try:
+            return webhook.async_generate_url(self.hass, webhook_id)
+        except NoURLAvailableError:
+            return webhook.async_generate_path(webhook_id)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""Adaptive polling policy for the Mailcow coordinator."""
+from datetime import datetime, tzinfo
+import logging
+import re
+
+import voluptuous as vol
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_QUIET_WINDOWS = "23:00-05:00"
+
+# Facteur appliqué aux intervalles pendant une fenêtre calme
+QUIET_INTERVAL_FACTOR = 6.0
+# Ralentissement progressif tant que les données ne changent pas
+BACKOFF_STEP = 1.5
+MAX_BACKOFF = 4.0
+# Plafond global (fenêtre calme et ralentissement cumulés)
+MAX_MULTIPLIER = 8.0
+# Après un changement d'état de conteneur ou de file, quelques tours accélérés
+FOLLOW_UP_FACTOR = 0.5
+FOLLOW_UP_POLLS = 3
+
+_WINDOW = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+
+def parse_quiet_windows(value: str) -> tuple[tuple[int, int], ...]:
+    """Parse "HH:MM-HH:MM, ..." into (start, end) minutes of the day.
+
+    Raises vol.Invalid on malformed input so it can back a form schema.
+    """
+    windows = []
+    for part in filter(None, (p.strip() for p in (value or "").split(","))):
+        match = _WINDOW.match(part)
+        if not match:
+            raise vol.Invalid(f"Invalid quiet window: {part}")
+        start_h, start_m, end_h, end_m = (int(g) for g in match.groups())
+        if start_h > 23 or end_h > 23 or start_m > 59 or end_m > 59:
+            raise vol.Invalid(f"Invalid quiet window: {part}")
+        windows.append((start_h * 60 + start_m, end_h * 60 + end_m))
+    return tuple(windows)
+
+
+def quiet_windows_validator(value: str) -> str:
+    parse_quiet_windows(value)
+    return value
+
+
+class PollingPolicy:
+    """Scale refresh intervals from quiet windows and recent data changes.
+
+    Quiet windows are parsed once; during one, intervals are stretched by
+    QUIET_INTERVAL_FACTOR instead of skipping refreshes entirely. When
+    adaptive, every refresh that returns identical data stretches intervals
+    by BACKOFF_STEP (up to MAX_BACKOFF) and any change brings them back to
+    normal. A container or queue state change additionally shortens the next
+    FOLLOW_UP_POLLS intervals, to confirm recovery or escalation quickly.
+    """
+
+    def __init__(self, quiet_windows: tuple[tuple[int, int], ...], adaptive: bool) -> None:
+        self._windows = quiet_windows
+        self._adaptive = adaptive
+        self._time_zone: tzinfo | None = None
+        self.backoff = 1.0
+        self._follow_up = 0
+
+    def set_time_zone(self, time_zone: tzinfo) -> None:
+        self._time_zone = time_zone
+
+    def in_quiet_window(self, now: datetime) -> bool:
+        if not self._windows:
+            return False
+        local = now.astimezone(self._time_zone) if self._time_zone else now
+        minute = local.hour * 60 + local.minute
+        for start, end in self._windows:
+            if start <= end:
+                if start <= minute < end:
+                    return True
+            elif minute >= start or minute < end:
+                return True
+        return False
+
+    def multiplier(self, now: datetime) -> float:
+        if self._follow_up:
+            return FOLLOW_UP_FACTOR
+        factor = self.backoff
+        if self.in_quiet_window(now):
+            factor *= QUIET_INTERVAL_FACTOR
+        return min(factor, MAX_MULTIPLIER)
+
+    def observe(self, changed: bool, state_changed: bool) -> None:
+        """Record the outcome of a refresh."""
+        if not self._adaptive:
+            return
+        if state_changed:
+            _LOGGER.debug("Mailcow container or queue state changed, polling faster")
+            self._follow_up = FOLLOW_UP_POLLS
+        elif self._follow_up:
+            self._follow_up -= 1
+        if changed:
+            self.backoff = 1.0
+        else:
+            self.backoff = min(self.backoff * BACKOFF_STEP, MAX_BACKOFF)
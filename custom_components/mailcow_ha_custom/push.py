@@ -0,0 +1,56 @@
+"""Webhook receiving container and mail queue states pushed from the Mailcow host."""
+import logging
+
+from aiohttp import web
+from aiohttp.hdrs import METH_POST
+import voluptuous as vol
+
+from homeassistant.components import webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CONF_WEBHOOK_ID, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Mêmes formes que status/containers et mailq/all, pour relayer les réponses telles quelles
+PUSH_SCHEMA = vol.Schema(
+    {
+        vol.Optional("containers"): vol.Any(dict, list),
+        vol.Optional("mail_queue"): list,
+    }
+)
+
+
+@callback
+def async_register_push_webhook(hass: HomeAssistant, entry: ConfigEntry, coordinator) -> None:
+    """Register the entry's webhook, creating its id on first use."""
+    webhook_id = entry.data.get(CONF_WEBHOOK_ID)
+    if webhook_id is None:
+        webhook_id = webhook.async_generate_id()
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook_id}
+        )
+
+    async def _async_handle(
+        hass: HomeAssistant, webhook_id: str, request: web.Request
+    ) -> web.Response:
+        try:
+            payload = PUSH_SCHEMA(await request.json())
+        except (ValueError, vol.Invalid) as err:
+            _LOGGER.warning("Ignoring invalid Mailcow push payload: %s", err)
+            return web.Response(status=400)
+        coordinator.async_apply_push(payload.get("containers"), payload.get("mail_queue"))
+        return web.Response(status=200)
+
+    # Mailcow tourne souvent hors du réseau local : l'identifiant aléatoire fait office de secret
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        f"Mailcow {entry.title}",
+        webhook_id,
+        _async_handle,
+        local_only=False,
+        allowed_methods=[METH_POST],
+    )
+    entry.async_on_unload(lambda: webhook.async_unregister(hass, webhook_id))
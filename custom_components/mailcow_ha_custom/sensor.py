@@ -1,121 +1,78 @@
 import logging
-from urllib.parse import urlparse
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
-from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.components.sensor import SensorEntity
 from .const import DOMAIN
+from .entity import MailcowEntity, async_track_description_entities
+from .sensor_descriptions import (
+    CONTAINER_SENSOR_TYPES,
+    DOMAIN_SENSOR_TYPES,
+    DOMAIN_TOTAL_SENSOR_TYPES,
+    ENDPOINT_SENSOR_TYPES,
+    LOG_SENSOR_TYPES,
+    MAILBOX_SENSOR_TYPES,
+    SECURITY_SENSOR_TYPES,
+    SENSOR_TYPES,
+    SYNCJOB_SENSOR_TYPES,
+    SYNCJOB_TOTAL_SENSOR_TYPES,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-def sanitize_url(url: str) -> str:
-    return ''.join(filter(str.isalnum, url))
 
-class MailcowSensor(CoordinatorEntity, SensorEntity):
-    def __init__(self, coordinator, name: str, key: str, icon: str):
-        super().__init__(coordinator)
-        self._attr_name = name
-        self._attr_icon = icon
-        self._key = key
-        self._base_url = coordinator._base_url
-        self._entry_id = coordinator.entry_id
-        self._attr_unique_id = (
-            f"mailcow_{key}_{sanitize_url(coordinator._base_url)}_{coordinator.entry_id}"
-        )
-        self._attr_state_class = None
+class MailcowSensor(MailcowEntity, SensorEntity):
+    """Mailcow sensor whose value is extracted once per coordinator update."""
 
     @property
     def native_value(self):
-        return self.coordinator.data.get(self._key)
-
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-            "manufacturer": "Master13011",
-            "model": "API",
-            "name": urlparse(self._base_url).netloc,
-            "sw_version": self.coordinator.data.get("version", "unknown"),
-            "configuration_url": self._base_url,
-            "entry_type": DeviceEntryType.SERVICE
-        }
+        return self._value
 
-class MailcowDomainCountSensor(MailcowSensor):
-    def __init__(self, coordinator):
-        super().__init__(coordinator, "Mailcow Domain Count", "domain_count", "mdi:domain")
 
-class MailcowMailboxCountSensor(MailcowSensor):
-    def __init__(self, coordinator):
-        super().__init__(coordinator, "Mailcow Mailbox Count", "mailbox_count", "mdi:email-multiple")
+class MailcowEndpointLatencySensor(MailcowSensor):
+    """p95 request latency of one endpoint; the full histograms are attributes."""
 
-class MailcowVersionSensor(MailcowSensor):
-    def __init__(self, coordinator):
-        super().__init__(coordinator, "Mailcow Version", "version", "mdi:package-variant")
+    # Les histogrammes changent à chaque requête : inutile de les historiser
+    _unrecorded_attributes = frozenset(
+        {"latency_ms", "size_bytes", "parse_ms", "statuses", "errors", "requests"}
+    )
 
-class MailcowVmailStatusSensor(MailcowSensor):
-    def __init__(self, coordinator):
-        super().__init__(coordinator, "Mailcow Vmail Status", "vmail_status", "mdi:harddisk")
-        self._attr_state_class = SensorStateClass.MEASUREMENT
-
-    @property
-    def native_value(self):
-        vmail_status = self.coordinator.data.get("vmail_status") or {}
-        used_str = vmail_status.get("used_percent", "0")
-        try:
-            return float(used_str.rstrip('%'))
-        except (ValueError, AttributeError):
-            _LOGGER.warning("Invalid vmail_status used_percent value: %s", used_str)
-            return 0.0
-        
-    @property
-    def native_unit_of_measurement(self):
-        return "%"
-    
-    @property
-    def extra_state_attributes(self):
-        status = self.coordinator.data.get("vmail_status") or {}
-        return {
-            "status": status.get("type"),
-            "disk": status.get("disk"),
-            "used": status.get("used"),
-            "total": status.get("total")
-        }
-
-class MailcowContainersStatusSensor(MailcowSensor):
-    def __init__(self, coordinator):
-        super().__init__(coordinator, "Mailcow Containers Status", "containers_status", "mdi:docker")
-        self._attr_device_class = None
-
-    @property
-    def native_value(self):
-        containers = self.coordinator.data.get("containers_status")
-        # Si containers est une liste de dicts
-        if isinstance(containers, list) and all(isinstance(c, dict) for c in containers):
-            if not containers:
-                return "No Data"
-            return "All Running" if all(c.get("state") == "running" for c in containers) else "Issues Detected"
-        # Si containers est un dict (pour compatibilité descendante)
-        if isinstance(containers, dict):
-            if not containers:
-                return "No Data"
-            return "All Running" if all(c.get("state") == "running" for c in containers.values()) else "Issues Detected"
-        return "Unknown"
-
-    @property
-    def extra_state_attributes(self):
-        containers = self.coordinator.data.get("containers_status")
-        return containers if isinstance(containers, (list, dict)) else {}
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    sensors = [
-        MailcowVersionSensor(coordinator),
-        MailcowMailboxCountSensor(coordinator),
-        MailcowDomainCountSensor(coordinator),
-        MailcowVmailStatusSensor(coordinator),
-        MailcowContainersStatusSensor(coordinator),
-    ]
-    async_add_entities(sensors, True)
-
-
-
-
+    entry_id = config_entry.entry_id
+    descriptions = list(SENSOR_TYPES)
+    if coordinator.log_sensors:
+        descriptions += LOG_SENSOR_TYPES
+    if coordinator.domain_sensors:
+        descriptions += DOMAIN_TOTAL_SENSOR_TYPES
+    if coordinator.security_sensors:
+        descriptions += SECURITY_SENSOR_TYPES
+    if coordinator.syncjob_sensors:
+        descriptions += SYNCJOB_TOTAL_SENSOR_TYPES
+    async_add_entities(
+        MailcowSensor(coordinator, entry_id, description) for description in descriptions
+    )
+
+    async_track_description_entities(
+        hass, config_entry, coordinator, CONTAINER_SENSOR_TYPES, MailcowSensor, async_add_entities
+    )
+    # Un capteur par endpoint interrogé, créé à la première requête
+    async_track_description_entities(
+        hass,
+        config_entry,
+        coordinator,
+        ENDPOINT_SENSOR_TYPES,
+        MailcowEndpointLatencySensor,
+        async_add_entities,
+    )
+    if coordinator.domain_sensors:
+        async_track_description_entities(
+            hass, config_entry, coordinator, DOMAIN_SENSOR_TYPES, MailcowSensor, async_add_entities
+        )
+    if coordinator.syncjob_sensors:
+        # Ajoutées et retirées au fil de l'apparition et de la disparition des tâches
+        async_track_description_entities(
+            hass, config_entry, coordinator, SYNCJOB_SENSOR_TYPES, MailcowSensor, async_add_entities
+        )
+    if coordinator.mailbox_sensors:
+        async_track_description_entities(
+            hass, config_entry, coordinator, MAILBOX_SENSOR_TYPES, MailcowSensor, async_add_entities
+        )
@@ -1,34 +1,434 @@
 # sensor_descriptions.py
 
-from homeassistant.components.sensor import SensorEntityDescription, SensorStateClass
-from homeassistant.const import PERCENTAGE
+from dataclasses import dataclass
+import logging
+from typing import Any
 
-SENSOR_TYPES: tuple[SensorEntityDescription, ...] = (
-    SensorEntityDescription(
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.util import dt as dt_util
+
+from .entity import MailcowEntityDescription
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class MailcowSensorEntityDescription(MailcowEntityDescription, SensorEntityDescription):
+    """Describes a Mailcow sensor."""
+
+
+def _vmail_percent(data: dict[str, Any]) -> float:
+    used_str = (data.get("vmail_status") or {}).get("used_percent", "0")
+    try:
+        return float(used_str.rstrip('%'))
+    except (ValueError, AttributeError):
+        _LOGGER.warning("Invalid vmail_status used_percent value: %s", used_str)
+        return 0.0
+
+
+def _vmail_attributes(data: dict[str, Any]) -> dict[str, Any]:
+    status = data.get("vmail_status") or {}
+    return {
+        "status": status.get("type"),
+        "disk": status.get("disk"),
+        "used": status.get("used"),
+        "total": status.get("total"),
+    }
+
+
+def _vmail_growth(data: dict[str, Any]) -> float | None:
+    forecast = data.get("vmail_forecast")
+    if forecast is None or forecast.growth_per_day is None:
+        return None
+    return round(forecast.growth_per_day / 2**20, 2)
+
+
+def _containers_state(data: dict[str, Any]) -> str:
+    containers = data.get("containers")
+    if containers is None:
+        return "Unknown"
+    if not containers:
+        return "No Data"
+    return "All Running" if all(c.running for c in containers.values()) else "Issues Detected"
+
+
+def _queue_value(field: str):
+    def value(data: dict[str, Any]) -> Any:
+        queue = data.get("mail_queue")
+        return getattr(queue, field) if queue is not None else None
+    return value
+
+
+def _oldest_queued_age(data: dict[str, Any]) -> float | None:
+    queue = data.get("mail_queue")
+    if queue is None:
+        return None
+    if queue.oldest_arrival is None:
+        return 0
+    return round((dt_util.utcnow() - queue.oldest_arrival).total_seconds() / 60, 1)
+
+
+def _fail2ban_count(field: str):
+    def value(data: dict[str, Any]) -> int | None:
+        bans = data.get("fail2ban")
+        return len(getattr(bans, field)) if bans is not None else None
+    return value
+
+
+def _log_value(field: str):
+    return lambda data: (data.get("log_stats") or {}).get(field)
+
+
+def _domains_total(field: str):
+    def value(data: dict[str, Any]) -> Any:
+        summary = data.get("domains")
+        return getattr(summary, field) if summary is not None else None
+    return value
+
+
+def _record_field(field: str):
+    return lambda record: getattr(record, field)
+
+
+SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
         key="version",
         name="Mailcow Version",
-        icon="mdi:package-variant"
+        icon="mdi:package-variant",
+        value_fn=lambda data: data.get("version"),
+        stale_key="version",
     ),
-    SensorEntityDescription(
+    MailcowSensorEntityDescription(
         key="mailbox_count",
-        name="Mailbox Count",
-        icon="mdi:email-multiple"
+        name="Mailcow Mailbox Count",
+        icon="mdi:email-multiple",
+        value_fn=lambda data: data.get("mailbox_count"),
+        stale_key="mailbox_count",
     ),
-    SensorEntityDescription(
+    MailcowSensorEntityDescription(
         key="domain_count",
-        name="Domain Count",
-        icon="mdi:domain"
+        name="Mailcow Domain Count",
+        icon="mdi:domain",
+        value_fn=lambda data: data.get("domain_count"),
+        stale_key="domain_count",
     ),
-    SensorEntityDescription(
+    MailcowSensorEntityDescription(
         key="vmail_status",
-        name="Vmail Usage",
+        name="Mailcow Vmail Status",
         icon="mdi:harddisk",
         native_unit_of_measurement=PERCENTAGE,
-        state_class=SensorStateClass.MEASUREMENT
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_vmail_percent,
+        attributes_fn=_vmail_attributes,
+        stale_key="vmail_status",
+    ),
+    MailcowSensorEntityDescription(
+        key="vmail_growth",
+        name="Mailcow Vmail Growth",
+        icon="mdi:chart-line",
+        native_unit_of_measurement=f"{UnitOfInformation.MEBIBYTES}/{UnitOfTime.DAYS}",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_vmail_growth,
+        stale_key="vmail_forecast",
     ),
-    SensorEntityDescription(
+    MailcowSensorEntityDescription(
+        key="vmail_time_to_full",
+        name="Mailcow Vmail Time Until Full",
+        icon="mdi:harddisk-remove",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.DAYS,
+        # Aucune valeur tant que l'historique est trop court ou que le volume ne grossit pas
+        value_fn=lambda data: getattr(data.get("vmail_forecast"), "days_until_full", None),
+        stale_key="vmail_forecast",
+    ),
+    MailcowSensorEntityDescription(
         key="containers_status",
-        name="Container Health",
-        icon="mdi:docker"
+        name="Mailcow Containers Status",
+        icon="mdi:docker",
+        value_fn=_containers_state,
+        # Résumé compact {conteneur: état} plutôt que la réponse brute
+        attributes_fn=lambda data: {
+            name: c.state for name, c in (data.get("containers") or {}).items()
+        },
+        stale_key="containers_status",
+    ),
+    MailcowSensorEntityDescription(
+        key="mail_queue",
+        name="Mailcow Mail Queue",
+        icon="mdi:tray-full",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_queue_value("total"),
+        attributes_fn=lambda data: dict(data["mail_queue"].by_queue) if data.get("mail_queue") else {},
+        stale_key="mail_queue",
+    ),
+    MailcowSensorEntityDescription(
+        key="mail_queue_deferred",
+        name="Mailcow Deferred Messages",
+        icon="mdi:email-alert",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_queue_value("deferred"),
+        stale_key="mail_queue",
+    ),
+    MailcowSensorEntityDescription(
+        key="mail_queue_oldest",
+        name="Mailcow Oldest Queued Message Age",
+        icon="mdi:timer-sand",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_oldest_queued_age,
+        stale_key="mail_queue",
+    ),
+)
+
+LOG_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = tuple(
+    MailcowSensorEntityDescription(
+        key=f"log_{field}",
+        name=name,
+        icon=icon,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_log_value(field),
+        attributes_fn=lambda data: {
+            "window_overflow": (data.get("log_stats") or {}).get("window_overflow", False)
+        },
+        stale_key="log_stats",
+    )
+    for field, name, icon in (
+        ("accepted", "Mailcow Messages Accepted", "mdi:email-check"),
+        ("rejected", "Mailcow Messages Rejected", "mdi:email-remove"),
+        ("greylisted", "Mailcow Messages Greylisted", "mdi:email-lock"),
+        ("deferred", "Mailcow Messages Deferred", "mdi:email-alert"),
+    )
+)
+
+SECURITY_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="quarantine",
+        name="Mailcow Quarantined Messages",
+        icon="mdi:email-lock-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data["quarantine"].total if data.get("quarantine") else None,
+        attributes_fn=lambda data: {
+            "by_action": data["quarantine"].by_action,
+            "by_score": data["quarantine"].by_score,
+        } if data.get("quarantine") else {},
+        stale_key="quarantine",
+    ),
+    MailcowSensorEntityDescription(
+        key="fail2ban_active",
+        name="Mailcow Active Bans",
+        icon="mdi:shield-lock",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_fail2ban_count("active"),
+        stale_key="fail2ban",
+    ),
+    MailcowSensorEntityDescription(
+        key="fail2ban_permanent",
+        name="Mailcow Permanent Bans",
+        icon="mdi:shield-off",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_fail2ban_count("permanent"),
+        stale_key="fail2ban",
+    ),
+)
+
+DOMAIN_TOTAL_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="domains_total_bytes_used",
+        name="Mailcow Storage Used",
+        icon="mdi:database",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.GIBIBYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_domains_total("bytes_used"),
+        stale_key="domains",
+    ),
+    MailcowSensorEntityDescription(
+        key="domains_total_percent_in_use",
+        name="Mailcow Quota Percent Used",
+        icon="mdi:gauge",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_domains_total("percent_in_use"),
+        stale_key="domains",
+    ),
+    MailcowSensorEntityDescription(
+        key="domains_total_messages",
+        name="Mailcow Messages Total",
+        icon="mdi:email-multiple-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_domains_total("messages"),
+        stale_key="domains",
+    ),
+)
+
+
+def _mailboxes(coordinator) -> dict[str, Any] | None:
+    return coordinator.data.get("mailboxes")
+
+
+MAILBOX_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="mailbox_quota_used",
+        name="Mailcow {item} Quota Used",
+        icon="mdi:email-box",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_mailboxes,
+        stale_key="mailboxes",
+        value_fn=_record_field("quota_used"),
+        attributes_fn=lambda record: {"quota": record.quota},
+    ),
+    MailcowSensorEntityDescription(
+        key="mailbox_percent_in_use",
+        name="Mailcow {item} Quota Percent Used",
+        icon="mdi:gauge",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_mailboxes,
+        stale_key="mailboxes",
+        value_fn=_record_field("percent_in_use"),
+    ),
+    MailcowSensorEntityDescription(
+        key="mailbox_messages",
+        name="Mailcow {item} Messages",
+        icon="mdi:email-multiple-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_mailboxes,
+        stale_key="mailboxes",
+        value_fn=_record_field("messages"),
+    ),
+)
+
+
+def _domains(coordinator) -> dict[str, Any] | None:
+    summary = coordinator.data.get("domains")
+    return summary.domains if summary is not None else None
+
+
+DOMAIN_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="domain_mailboxes",
+        name="Mailcow {item} Mailboxes",
+        icon="mdi:email-multiple",
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_domains,
+        stale_key="domains",
+        value_fn=_record_field("mailboxes"),
+    ),
+    MailcowSensorEntityDescription(
+        key="domain_bytes_used",
+        name="Mailcow {item} Storage Used",
+        icon="mdi:database",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.MEBIBYTES,
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_domains,
+        stale_key="domains",
+        value_fn=_record_field("bytes_used"),
+        attributes_fn=lambda record: {"quota": record.quota},
+    ),
+    MailcowSensorEntityDescription(
+        key="domain_percent_in_use",
+        name="Mailcow {item} Quota Percent Used",
+        icon="mdi:gauge",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_domains,
+        stale_key="domains",
+        value_fn=_record_field("percent_in_use"),
+    ),
+    MailcowSensorEntityDescription(
+        key="domain_messages",
+        name="Mailcow {item} Messages",
+        icon="mdi:email-multiple-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        items_fn=_domains,
+        stale_key="domains",
+        value_fn=_record_field("messages"),
+    ),
+)
+
+SYNCJOB_TOTAL_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="syncjobs_failing",
+        name="Mailcow Sync Jobs Failing",
+        icon="mdi:sync-alert",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data["syncjobs"].failing if data.get("syncjobs") is not None else None,
+        attributes_fn=lambda data: {"jobs": len(data["syncjobs"])} if data.get("syncjobs") is not None else {},
+        stale_key="syncjobs",
+    ),
+    MailcowSensorEntityDescription(
+        key="syncjobs_oldest_success",
+        name="Mailcow Oldest Successful Sync",
+        icon="mdi:sync",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda data: data["syncjobs"].oldest_success if data.get("syncjobs") is not None else None,
+        stale_key="syncjobs",
+    ),
+)
+
+# Une entité par tâche : l'état change peu, le retard reste à 0 tant qu'elle passe à l'heure
+SYNCJOB_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="syncjob",
+        name="Mailcow Sync Job {item}",
+        icon="mdi:email-sync",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        items_fn=lambda coordinator: coordinator.data["syncjobs"].jobs
+        if coordinator.data.get("syncjobs") is not None
+        else None,
+        stale_key="syncjobs",
+        value_fn=lambda record: record.exit_status,
+        attributes_fn=lambda record: {
+            "user": record.user,
+            "host": record.host,
+            "active": record.active,
+            "running": record.running,
+            "last_run": record.last_run.isoformat() if record.last_run else None,
+            "success": record.success,
+            "lag_minutes": record.lag,
+        },
+    ),
+)
+
+# Heure de démarrage plutôt qu'une durée : pas d'écriture d'état chaque seconde
+CONTAINER_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="container_started",
+        name="Mailcow {item} Started",
+        icon="mdi:clock-start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        items_fn=lambda coordinator: coordinator.data.get("containers"),
+        value_fn=_record_field("started_at"),
+        stale_key="containers_status",
+    ),
+)
+
+# Créés à la première requête de chaque endpoint ; désactivés par défaut
+ENDPOINT_SENSOR_TYPES: tuple[MailcowSensorEntityDescription, ...] = (
+    MailcowSensorEntityDescription(
+        key="latency",
+        name="Mailcow {item} Latency",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        items_fn=lambda coordinator: coordinator.endpoint_metrics(),
+        sanitize_item=True,
+        value_fn=lambda metrics: metrics.summary()["latency_ms"]["p95"],
+        attributes_fn=lambda metrics: metrics.summary(),
     ),
 )
@@ -0,0 +1,54 @@
+"""Services for the Mailcow integration."""
+import logging
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN
+from .exceptions import MailcowAPIError
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
+SERVICE_FLUSH_QUEUE = "flush_queue"
+SERVICE_DELETE_QUEUE = "delete_queue"
+
+SERVICE_SCHEMA = vol.Schema({vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string})
+# Action destructrice : jamais appliquée implicitement à tous les serveurs
+DELETE_QUEUE_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+
+
+def _get_coordinators(hass: HomeAssistant, entry_id: str | None) -> list:
+    coordinators = hass.data.get(DOMAIN, {})
+    if entry_id is None:
+        # Plusieurs entrées peuvent partager le même poller
+        return list({id(c): c for c in coordinators.values()}.values())
+    if entry_id not in coordinators:
+        raise HomeAssistantError(f"Mailcow config entry {entry_id} is not loaded")
+    return [coordinators[entry_id]]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the mail queue services."""
+
+    async def _async_handle_queue_action(call: ServiceCall) -> None:
+        for coordinator in _get_coordinators(hass, call.data.get(ATTR_CONFIG_ENTRY_ID)):
+            try:
+                if call.service == SERVICE_FLUSH_QUEUE:
+                    await coordinator.api.flush_mail_queue()
+                else:
+                    await coordinator.api.delete_mail_queue()
+            except MailcowAPIError as err:
+                raise HomeAssistantError(f"Mailcow {call.service} failed: {err}") from err
+            _LOGGER.info("Mailcow %s done for entry %s", call.service, coordinator.entry_id)
+            await coordinator.async_request_refresh_keys(("mail_queue",))
+
+    for service, schema in (
+        (SERVICE_FLUSH_QUEUE, SERVICE_SCHEMA),
+        (SERVICE_DELETE_QUEUE, DELETE_QUEUE_SCHEMA),
+    ):
+        hass.services.async_register(DOMAIN, service, _async_handle_queue_action, schema=schema)
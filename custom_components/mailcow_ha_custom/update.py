@@ -1,42 +1,27 @@
 import logging
-from urllib.parse import urlparse
 from homeassistant.components.update import UpdateEntity
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.device_registry import DeviceEntryType
 
 from .const import DOMAIN
+from .entity import MailcowCoordinatorEntity, entry_device_info, sanitize_url
 
 _LOGGER = logging.getLogger(__name__)
 
-def sanitize_url(url: str) -> str:
-    return ''.join(filter(str.isalnum, url))
-
-class MailcowUpdateEntity(CoordinatorEntity, UpdateEntity):
+class MailcowUpdateEntity(MailcowCoordinatorEntity, UpdateEntity):
     """Representation of a Mailcow update entity."""
 
     _attr_has_entity_name = True
     _attr_entity_category = EntityCategory.CONFIG
 
-    def __init__(self, coordinator):
+    def __init__(self, coordinator, entry_id: str):
         super().__init__(coordinator)
         self._attr_name = "Mailcow Update"
         self._attr_unique_id = (
-            f"mailcow_update_{sanitize_url(coordinator._base_url)}_{coordinator.entry_id}"
+            f"mailcow_update_{sanitize_url(coordinator._base_url)}_{entry_id}"
         )
         self._base_url = coordinator._base_url
-        self._entry_id = coordinator.entry_id
-
-    @property
-    def device_info(self):
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-            "manufacturer": "Master13011",
-            "model": "API",
-            "name": urlparse(self._base_url).netloc,
-            "sw_version": self.installed_version or "unknown",
-            "entry_type": DeviceEntryType.SERVICE
-        }
+        self._entry_id = entry_id
+        self._attr_device_info = entry_device_info(coordinator, entry_id)
 
     @property
     def installed_version(self):
@@ -59,4 +44,5 @@ class MailcowUpdateEntity(CoordinatorEntity, UpdateEntity):
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
-    async_add_entities([MailcowUpdateEntity(coordinator)], True)
+    entry_id = config_entry.entry_id
+    async_add_entities([MailcowUpdateEntity(coordinator, entry_id)])
@@ -0,0 +1,141 @@
+"""Tests for the per-host circuit breaker and its use by the API client."""
+import asyncio
+
+import pytest
+
+from custom_components.mailcow_ha_custom import api as api_module, circuit_breaker
+from custom_components.mailcow_ha_custom.api import MailcowAPI
+from custom_components.mailcow_ha_custom.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.mailcow_ha_custom.const import CONF_API_KEY, CONF_BASE_URL
+from custom_components.mailcow_ha_custom.exceptions import MailcowConnectionError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def open_breaker(clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(
+        "mail.example.org", failure_threshold=2, reset_timeout=60, trial_timeout=120
+    )
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker("mail.example.org", failure_threshold=2)
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+    assert breaker.opened_count == 1
+    assert breaker.rejected_count == 1
+
+
+def test_success_resets_failures(clock):
+    breaker = CircuitBreaker("mail.example.org", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_single_trial_after_reset_timeout(clock):
+    breaker = open_breaker(clock)
+    clock.now += 59
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_trial_success_closes(clock):
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request()
+
+
+def test_trial_failure_reopens(clock):
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.opened_count == 2
+    assert not breaker.allow_request()
+    clock.now += 60
+    assert breaker.allow_request()
+
+
+def test_released_trial_lets_next_request_probe(clock):
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.allow_request()
+
+
+def test_stuck_trial_expires(clock):
+    breaker = open_breaker(clock)
+    clock.now += 60
+    assert breaker.allow_request()
+    clock.now += 119
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_cancel_during_retry_delay_releases_trial(clock, monkeypatch):
+    breaker = open_breaker(clock)
+    monkeypatch.setattr(api_module, "get_circuit_breaker", lambda host: breaker)
+    client = MailcowAPI(
+        {CONF_BASE_URL: "https://mail.example.org", CONF_API_KEY: "key"}, session=None
+    )
+
+    async def failing_request(*args, **kwargs):
+        raise MailcowConnectionError("Connection timed out")
+
+    monkeypatch.setattr(client, "_request_once", failing_request)
+
+    async def run() -> None:
+        sleeping = asyncio.Event()
+
+        async def sleep(delay):
+            sleeping.set()
+            await asyncio.Future()
+
+        monkeypatch.setattr(api_module.asyncio, "sleep", sleep)
+        task = asyncio.ensure_future(client.get_status_version())
+        await sleeping.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    clock.now += 60
+    asyncio.run(run())
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
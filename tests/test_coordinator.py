@@ -0,0 +1,138 @@
+"""Tests for the coordinator's refresh outcome and scheduling, against a fake Mailcow API."""
+import asyncio
+
+import pytest
+from homeassistant.const import MAJOR_VERSION, MINOR_VERSION
+from homeassistant.core import HomeAssistant
+
+from custom_components.mailcow_ha_custom.coordinator import MailcowCoordinator
+from custom_components.mailcow_ha_custom.exceptions import MailcowConnectionError
+from custom_components.mailcow_ha_custom.models import MailQueueSummary
+
+pytestmark = pytest.mark.skipif(
+    (MAJOR_VERSION, MINOR_VERSION) < (2025, 8),
+    reason="the integration requires Home Assistant 2025.8 or later",
+)
+
+BASE_URL = "https://mail.example.org"
+
+
+class FakeApi:
+    """Answers every status call, or fails them all while reachable is False."""
+
+    def __init__(self) -> None:
+        self.reachable = True
+        self.calls: dict[str, int] = {}
+
+    async def _answer(self, key: str, value):
+        self.calls[key] = self.calls.get(key, 0) + 1
+        if not self.reachable:
+            raise MailcowConnectionError("Connection timed out")
+        return value
+
+    async def get_status_version(self):
+        return await self._answer("version", "2025-07")
+
+    async def get_mailbox_count(self):
+        return await self._answer("mailbox_count", 12)
+
+    async def get_domain_count(self):
+        return await self._answer("domain_count", 2)
+
+    async def get_status_vmail(self):
+        return await self._answer("vmail_status", {"used": "1.0G", "total": "10G"})
+
+    async def get_status_containers(self):
+        return await self._answer(
+            "containers_status",
+            {"postfix-mailcow": {"container": "postfix-mailcow", "state": "running"}},
+        )
+
+    async def get_mail_queue(self):
+        return await self._answer("mail_queue", MailQueueSummary(0, {}, None))
+
+
+class FakeGitHub:
+    metrics = None
+
+    async def async_get_latest_version(self) -> str:
+        return "2025-07"
+
+
+async def run_with_hass(tmp_path, test) -> None:
+    hass = HomeAssistant(str(tmp_path))
+    try:
+        await test(hass)
+    finally:
+        await hass.async_stop(force=True)
+
+
+def make_coordinator(hass: HomeAssistant, api: FakeApi, **options) -> MailcowCoordinator:
+    coordinator = MailcowCoordinator(
+        hass,
+        api,
+        scan_interval=10,
+        disable_check_at_night=False,
+        entry_id="entry",
+        base_url=BASE_URL,
+        adaptive_polling=False,
+        **options,
+    )
+    coordinator._github = FakeGitHub()
+    return coordinator
+
+
+def test_outage_makes_polled_values_unavailable(tmp_path):
+    async def test(hass: HomeAssistant) -> None:
+        api = FakeApi()
+        coordinator = make_coordinator(hass, api)
+        await coordinator.async_restore_snapshot()
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+
+        api.reachable = False
+        await coordinator.async_request_refresh_keys(list(coordinator._fetchers))
+        assert not coordinator.last_update_success
+
+    asyncio.run(run_with_hass(tmp_path, test))
+
+
+def test_restored_values_served_until_first_refresh(tmp_path):
+    async def test(hass: HomeAssistant) -> None:
+        api = FakeApi()
+        polled = make_coordinator(hass, api)
+        await polled.async_restore_snapshot()
+        await polled.async_refresh()
+        await polled._store.async_save(polled._snapshot())
+
+        api.reachable = False
+        coordinator = make_coordinator(hass, api)
+        assert await coordinator.async_restore_snapshot()
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+        assert coordinator.data["version"] == "2025-07"
+        assert coordinator.is_stale("version")
+
+        # La panne persiste : les valeurs restaurées ne sont plus servies
+        await coordinator.async_refresh()
+        assert not coordinator.last_update_success
+
+    asyncio.run(run_with_hass(tmp_path, test))
+
+
+def test_pushes_do_not_delay_polling(tmp_path):
+    async def test(hass: HomeAssistant) -> None:
+        api = FakeApi()
+        coordinator = make_coordinator(hass, api, containers_scan_interval=2)
+        await coordinator.async_restore_snapshot()
+        coordinator.async_add_listener(lambda: None)
+        await coordinator.async_refresh()
+        assert api.calls["containers_status"] == 1
+
+        # Des pushs plus fréquents que l'intervalle de deux secondes
+        for _ in range(8):
+            coordinator.async_apply_push(mail_queue=[])
+            await asyncio.sleep(0.45)
+        assert api.calls["containers_status"] >= 2
+
+    asyncio.run(run_with_hass(tmp_path, test))
@@ -0,0 +1,42 @@
+"""Tests for the chunked JSON array counter."""
+import json
+
+import pytest
+
+from custom_components.mailcow_ha_custom.jsonstream import JsonArrayCounter
+
+
+def count(document: str, chunk_size: int) -> int | None:
+    payload = document.encode()
+    counter = JsonArrayCounter()
+    for start in range(0, len(payload), chunk_size):
+        counter.feed(payload[start:start + chunk_size])
+    return counter.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 4096])
+@pytest.mark.parametrize(
+    ("document", "expected"),
+    [
+        ("[1e5, -2, true, null]", 4),
+        ("[1.5,2,3]", 3),
+        ("[1.25e-3]", 1),
+        ('[{"a": [1, 2]}, "x,]", 12]', 3),
+        ("[ ]", 0),
+        ('{"mailboxes": 3}', None),
+    ],
+)
+def test_counts_top_level_elements(document, expected, chunk_size):
+    assert count(document, chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+@pytest.mark.parametrize("document", ["[1 2]", "[1,,2]", "[,1]", "[1,]", "[1.x]"])
+def test_rejects_malformed_arrays(document, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        count(document, chunk_size)
+
+
+def test_truncated_array():
+    with pytest.raises(ValueError):
+        count('[{"a": 1}, 2', 4096)
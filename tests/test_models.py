@@ -0,0 +1,47 @@
+"""Tests for the records built from bulk Mailcow API responses."""
+from datetime import datetime, timezone
+
+import pytest
+
+from custom_components.mailcow_ha_custom.models import (
+    index_mailboxes,
+    summarize_domains,
+    summarize_syncjobs,
+)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+BUILDERS = (
+    index_mailboxes,
+    summarize_domains,
+    lambda payload: summarize_syncjobs(payload, NOW, timezone.utc),
+)
+
+
+@pytest.mark.parametrize("build", BUILDERS)
+@pytest.mark.parametrize(
+    "payload", [{"type": "error", "msg": "access denied"}, None, "", 0]
+)
+def test_unexpected_payload_is_not_empty(build, payload):
+    assert build(payload) is None
+
+
+@pytest.mark.parametrize("build", BUILDERS)
+@pytest.mark.parametrize("payload", [[], {}])
+def test_empty_collection(build, payload):
+    result = build(payload)
+    assert result is not None
+    assert len(result) == 0
+
+
+def test_index_mailboxes():
+    mailboxes = index_mailboxes(
+        [
+            {"username": "a@example.org", "quota": "1024", "quota_used": 512,
+             "percent_in_use": "50", "messages": 3},
+            {"username": "", "quota": 1},
+            "garbage",
+        ]
+    )
+    assert list(mailboxes) == ["a@example.org"]
+    assert mailboxes["a@example.org"].percent_in_use == 50.0